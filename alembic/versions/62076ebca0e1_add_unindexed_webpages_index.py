@@ -0,0 +1,32 @@
+"""Add partial index for unindexed webpages
+
+Revision ID: 62076ebca0e1
+Revises: 2f0f322e6a1a
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '62076ebca0e1'
+down_revision = '2f0f322e6a1a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves the indexer's "unindexed pages in collection X" scans and the
+    # crawl-gating count without touching rows that are already indexed
+    op.create_index(
+        'ix_webpages_collection_unindexed',
+        'webpages',
+        ['collection_id'],
+        unique=False,
+        postgresql_where=sa.text('is_indexed = false AND content_markdown IS NOT NULL'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_webpages_collection_unindexed', table_name='webpages')
@@ -1,12 +1,13 @@
 """
 Chat endpoints for the GovStack API.
 """
+import json
 from fastapi import APIRouter, Depends, HTTPException, Path, Body
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
-from uuid import uuid4
 from pydantic_core import to_jsonable_python
 from pydantic_ai.messages import ModelMessagesTypeAdapter
 
@@ -14,6 +15,7 @@ from app.db.database import get_db
 from app.utils.chat_persistence import ChatPersistenceService
 from app.core.orchestrator import generate_agent, Output, Source, Usage, UsageDetails
 from app.core.orchestrator import run_agent as run_llamaindex_agent
+from app.core.orchestrator import run_agent_stream as run_llamaindex_agent_stream
 from app.core.compatibility_orchestrator import convert_pydantic_ai_messages_to_llamaindex
 from app.core.event_orchestrator import generate_agent_with_events, EventTrackingContext
 from app.utils.security import validate_api_key, require_read_permission, require_write_permission, require_delete_permission, APIKeyInfo
@@ -115,6 +117,84 @@ class ChatHistoryResponse(BaseModel):
         }
 
 
+async def _ensure_chat_session(db: AsyncSession, request: ChatRequest) -> str:
+    """Return the session ID for a request, creating the chat session if needed."""
+    if request.session_id:
+        # Check if session exists
+        existing_chat = await ChatPersistenceService.get_chat_by_session_id(db, request.session_id)
+        if not existing_chat:
+            # Create new session with provided ID
+            await ChatPersistenceService.create_chat_session_with_id(db, request.session_id, request.user_id)
+        return request.session_id
+    # Create completely new session
+    return await ChatPersistenceService.create_chat_session(db, request.user_id)
+
+
+def _request_language(request: ChatRequest) -> Optional[str]:
+    """Preferred language from the request field, falling back to metadata."""
+    return request.language or (request.metadata.get("language") if request.metadata else None)
+
+
+async def _load_llamaindex_history(db: AsyncSession, session_id: str) -> Optional[List[Any]]:
+    """Load chat history (Pydantic-AI format) and convert it to LlamaIndex ChatMessages."""
+    history_pydantic = await ChatPersistenceService.load_history(db, session_id)
+    return convert_pydantic_ai_messages_to_llamaindex(history_pydantic) if history_pydantic else None
+
+
+async def _save_llamaindex_turn(
+    db: AsyncSession,
+    session_id: str,
+    request: ChatRequest,
+    redacted_user_message: str,
+    li_response: Output
+) -> None:
+    """Persist the user message and the LlamaIndex agent's answer."""
+    await ChatPersistenceService.save_message(
+        db=db,
+        session_id=session_id,
+        message_type="user",
+        message_object={"content": redacted_user_message, "metadata": request.metadata or {}}
+    )
+
+    await ChatPersistenceService.save_message(
+        db=db,
+        session_id=session_id,
+        message_type="assistant",
+        message_object={
+            "content": li_response.answer,
+            "sources": [s.model_dump() for s in li_response.sources],
+            "confidence": li_response.confidence,
+            "retriever_type": li_response.retriever_type,
+            "recommended_follow_up_questions": [q.model_dump() for q in li_response.recommended_follow_up_questions],
+        },
+        # Save a minimal history compatible with our loader
+        history=to_jsonable_python([{"role": "assistant", "content": li_response.answer}])
+    )
+
+
+def _llamaindex_chat_response(
+    session_id: str,
+    li_response: Output,
+    pii_matches: Any,
+    language: Optional[str]
+) -> ChatResponse:
+    """Build the API response, prepending the PII notice if PII was detected."""
+    final_answer = li_response.answer
+    if pii_matches:
+        final_answer = f"{get_pii_warning(language)}\n\n" + final_answer
+
+    return ChatResponse(
+        session_id=session_id,
+        answer=final_answer,
+        sources=li_response.sources,
+        confidence=li_response.confidence,
+        retriever_type=li_response.retriever_type,
+        usage=li_response.usage,
+        recommended_follow_up_questions=li_response.recommended_follow_up_questions,
+        trace_id=None,
+    )
+
+
 @router.post("/", response_model=ChatResponse)
 async def process_chat(
     request: ChatRequest,
@@ -128,18 +208,7 @@ async def process_chat(
         logger.info(f"Processing chat request for session: {request.session_id}")
         
         # Create or retrieve session ID
-        session_id = request.session_id or str(uuid4())
-        
-        # Handle chat persistence
-        if request.session_id:
-            # Check if session exists
-            existing_chat = await ChatPersistenceService.get_chat_by_session_id(db, session_id)
-            if not existing_chat:
-                # Create new session with provided ID
-                await ChatPersistenceService.create_chat_session_with_id(db, session_id, request.user_id)
-        else:
-            # Create completely new session
-            session_id = await ChatPersistenceService.create_chat_session(db, request.user_id)
+        session_id = await _ensure_chat_session(db, request)
         
         # Load chat history for context
         chat_history = await ChatPersistenceService.load_history(db, session_id)
@@ -239,6 +308,76 @@ async def process_chat(
         )
 
 
+@router.post("/stream")
+async def process_chat_stream(
+    request: ChatRequest,
+    agency: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    api_key_info: APIKeyInfo = Depends(require_write_permission)
+) -> StreamingResponse:
+    """
+    Process a chat message and stream the answer as Server-Sent Events.
+
+    Each event is a JSON object: ``{"type": "delta", "content": ...}`` for answer
+    text as it is generated, then a single ``{"type": "final", ...}`` trailer with the
+    full ChatResponse payload (sources, follow-up questions, usage).
+    """
+    logger.info(f"Processing streaming chat request for session: {request.session_id}")
+
+    session_id = await _ensure_chat_session(db, request)
+    llama_history = await _load_llamaindex_history(db, session_id)
+
+    # PII pre-check and redaction before processing/storage
+    pii_matches = detect_pii(request.message)
+    redacted_user_message = redact_pii(request.message, pii_matches) if pii_matches else request.message
+    language = _request_language(request)
+
+    async def event_stream():
+        try:
+            if pii_matches:
+                pii_notice = f"{get_pii_warning(language)}\n\n"
+                yield f"data: {json.dumps({'type': 'delta', 'content': pii_notice})}\n\n"
+
+            li_response: Optional[Output] = None
+            async for item in run_llamaindex_agent_stream(
+                message=redacted_user_message,
+                chat_history=llama_history,
+                session_id=session_id,
+                agencies=agency,
+                language=language,
+                metadata=request.metadata,
+                db=db
+            ):
+                if isinstance(item, Output):
+                    li_response = item
+                else:
+                    yield f"data: {json.dumps({'type': 'delta', 'content': item})}\n\n"
+
+            if li_response is None:
+                # The agent stream should always end with an Output; fall back to the
+                # standard no-answer message so the client still gets a final event
+                logger.warning(f"Agent stream for session {session_id} ended without a final response")
+                li_response = Output(
+                    answer=get_no_answer_message(language),
+                    sources=[],
+                    confidence=0.0,
+                    retriever_type="unknown",
+                    usage=Usage(requests=1, request_tokens=0, response_tokens=0, total_tokens=0),
+                    recommended_follow_up_questions=[]
+                )
+
+            await _save_llamaindex_turn(db, session_id, request, redacted_user_message, li_response)
+
+            chat_response = _llamaindex_chat_response(session_id, li_response, pii_matches, language)
+            yield f"data: {json.dumps({'type': 'final', **chat_response.model_dump(mode='json')})}\n\n"
+
+        except Exception as e:
+            logger.error(f"Error processing streaming chat: {e}", exc_info=True)
+            yield f"data: {json.dumps({'type': 'error', 'detail': f'Error processing chat message: {str(e)}'})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/{agency}", response_model=ChatResponse)
 async def process_chat_by_agency(
     agency: str = Path(..., description="The agency key to scope tools (e.g., kfc, kfcb, brs, odpc)"),
@@ -253,24 +392,13 @@ async def process_chat_by_agency(
     try:
         logger.info(f"Processing agency-scoped chat request for agency: {agency}, session: {request.session_id}")
 
-        # Create or retrieve session ID
-        session_id = request.session_id or str(uuid4())
-
-        # Handle chat persistence
-        if request.session_id:
-            existing_chat = await ChatPersistenceService.get_chat_by_session_id(db, session_id)
-            if not existing_chat:
-                await ChatPersistenceService.create_chat_session_with_id(db, session_id, request.user_id)
-        else:
-            session_id = await ChatPersistenceService.create_chat_session(db, request.user_id)
-
-        # Load chat history for context (Pydantic-AI format) and convert to LlamaIndex ChatMessage
-        history_pydantic = await ChatPersistenceService.load_history(db, session_id)
-        llama_history = convert_pydantic_ai_messages_to_llamaindex(history_pydantic) if history_pydantic else None
+        session_id = await _ensure_chat_session(db, request)
+        llama_history = await _load_llamaindex_history(db, session_id)
 
         # PII pre-check and redaction before processing/storage
         pii_matches = detect_pii(request.message)
         redacted_user_message = redact_pii(request.message, pii_matches) if pii_matches else request.message
+        language = _request_language(request)
 
         # Run the LlamaIndex agent directly with agency filter
         li_response: Output = await run_llamaindex_agent(
@@ -278,50 +406,14 @@ async def process_chat_by_agency(
             chat_history=llama_history,
             session_id=session_id,
             agencies=agency,
-            language=request.language or (request.metadata.get("language") if request.metadata else None),
+            language=language,
             metadata=request.metadata,
             db=db
         )
 
-        # Persist user and assistant messages
-        await ChatPersistenceService.save_message(
-            db=db,
-            session_id=session_id,
-            message_type="user",
-            message_object={"content": redacted_user_message, "metadata": request.metadata or {}}
-        )
+        await _save_llamaindex_turn(db, session_id, request, redacted_user_message, li_response)
 
-        await ChatPersistenceService.save_message(
-            db=db,
-            session_id=session_id,
-            message_type="assistant",
-            message_object={
-                "content": li_response.answer,
-                "sources": [s.model_dump() for s in li_response.sources],
-                "confidence": li_response.confidence,
-                "retriever_type": li_response.retriever_type,
-                "recommended_follow_up_questions": [q.model_dump() for q in li_response.recommended_follow_up_questions],
-            },
-            # Save a minimal history compatible with our loader
-            history=to_jsonable_python([{"role": "assistant", "content": li_response.answer}])
-        )
-
-        # If PII was detected, prepend a safety notice to the model's answer (not storing PII)
-        final_answer = li_response.answer
-        if pii_matches:
-            final_answer = f"{get_pii_warning(request.language or (request.metadata.get('language') if request.metadata else None))}\n\n" + final_answer
-
-        # Build API response
-        return ChatResponse(
-            session_id=session_id,
-            answer=final_answer,
-            sources=li_response.sources,
-            confidence=li_response.confidence,
-            retriever_type=li_response.retriever_type,
-            usage=li_response.usage,
-            recommended_follow_up_questions=li_response.recommended_follow_up_questions,
-            trace_id=None,
-        )
+        return _llamaindex_chat_response(session_id, li_response, pii_matches, language)
 
     except Exception as e:
         logger.error(f"Error processing agency-scoped chat: {e}", exc_info=True)
@@ -72,7 +72,7 @@ logging.getLogger('sqlalchemy').setLevel(logging.WARNING)
 logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
 
 # Database configuration
-from app.db.database import get_db, engine, async_session
+from app.db.database import get_db, get_engine, get_session_maker
 
 
 def _get_file_extension(filename: Optional[str]) -> str:
@@ -125,7 +125,7 @@ async def _ensure_upload_ready(upload_file: UploadFile) -> int:
 async def lifespan(app: FastAPI):
     # Startup logic
     logger.info("Starting up GovStack API")
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         # In production, rely on Alembic migrations instead of create_all.
         # Enable this only for local dev bootstrapping by setting DB_AUTO_CREATE=true
         if os.getenv("DB_AUTO_CREATE", "false").lower() == "true":
@@ -134,9 +134,18 @@ async def lifespan(app: FastAPI):
             await conn.run_sync(ChatBase.metadata.create_all)
             await conn.run_sync(ChatEventBase.metadata.create_all)
             await conn.run_sync(AuditBase.metadata.create_all)
+    # Load the embedding model, LLM client and tokenizer before the first chat request
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true":
+        from app.core.llamaindex_orchestrator import warmup
+        await warmup()
     yield
     # Shutdown logic
     logger.info("Shutting down GovStack API")
+    from app.core.llamaindex_orchestrator import close_llm_http_client
+    await close_llm_http_client()
+    from app.core.rag.indexer import shutdown_parse_pool
+    shutdown_parse_pool()
+    await get_engine().dispose()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -1544,7 +1553,7 @@ async def start_crawl(
                     follow_external=request_data.follow_external,
                     strategy=request_data.strategy,
                     collection_id=request_data.collection_id,
-                    session_maker=async_session,
+                    session_maker=get_session_maker(),
                     task_status=crawl_tasks[task_id],
                     user_id=api_key_info.get_user_id(),  # Pass user ID for audit trail
                     api_key_name=api_key_info.name  # Pass API key name for audit trail
@@ -218,16 +218,40 @@ class CompatibilityResponse:
         return self.output.answer
 
 
+# Shared instance: CompatibilityAgent keeps no per-session state (everything
+# session-specific is passed to run()), so one instance serves every request.
+_compatibility_agent: Optional[CompatibilityAgent] = None
+
+
+def get_compatibility_agent() -> CompatibilityAgent:
+    """
+    Return the process-wide CompatibilityAgent, creating it on first use.
+    
+    Returns:
+        Shared CompatibilityAgent instance
+    """
+    global _compatibility_agent
+    if _compatibility_agent is None:
+        logger.info("Creating compatibility agent with LlamaIndex backend")
+        _compatibility_agent = CompatibilityAgent()
+    return _compatibility_agent
+
+
+def reset_compatibility_agent() -> None:
+    """Drop the shared CompatibilityAgent so the next call builds a new one."""
+    global _compatibility_agent
+    _compatibility_agent = None
+
+
 # Factory function to create agents (for backward compatibility)
 def generate_agent() -> CompatibilityAgent:
     """
     Generate a compatibility agent that uses LlamaIndex backend.
     
     Returns:
-        CompatibilityAgent instance
+        Shared CompatibilityAgent instance
     """
-    logger.info("Creating compatibility agent with LlamaIndex backend")
-    return CompatibilityAgent()
+    return get_compatibility_agent()
 
 
 def generate_agent_with_events() -> CompatibilityAgent:
@@ -235,11 +259,10 @@ def generate_agent_with_events() -> CompatibilityAgent:
     Generate a compatibility agent with event tracking support.
     
     Returns:
-        CompatibilityAgent instance (events will be handled separately)
+        Shared CompatibilityAgent instance (events will be handled separately)
     """
-    logger.info("Creating compatibility agent with event tracking support")
     # For now, return the same agent - events can be handled in the API layer
-    return CompatibilityAgent()
+    return get_compatibility_agent()
 
 
 # Export the main classes and functions for backward compatibility
@@ -248,6 +271,8 @@ __all__ = [
     'CompatibilityResponse', 
     'generate_agent',
     'generate_agent_with_events',
+    'get_compatibility_agent',
+    'reset_compatibility_agent',
     'Output',
     'Source',
     'Usage',
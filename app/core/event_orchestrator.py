@@ -2,24 +2,18 @@
 Enhanced orchestrator with event tracking integration.
 """
 
-from app.utils.prompts import SYSTEM_PROMPT
+from app.utils.prompts import SYSTEM_PROMPT, format_collections_for_prompt
 from app.core.rag.tool_loader import tools, collection_dict
-from llama_index.core import Settings
-from pydantic_ai import Agent
-from llama_index.llms.openai import OpenAI
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from pydantic import BaseModel, Field
-from typing import List, Optional, Any, Dict, Union
-from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter
-from pydantic_core import to_jsonable_python
+from typing import TYPE_CHECKING, Optional, Dict
 from app.core.orchestrator import Output
-import yaml
 import os
+from functools import lru_cache
 from contextvars import ContextVar
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
-from pydantic_ai.models.groq import GroqModel
-from pydantic_ai.providers.groq import GroqProvider
+
+if TYPE_CHECKING:
+    from pydantic_ai import Agent
 
 logger = logging.getLogger(__name__)
 
@@ -32,17 +26,8 @@ db_context: ContextVar[Optional[AsyncSession]] = ContextVar('db', default=None)
 from dotenv import load_dotenv
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("RUNPOD_API_KEY"),
-    base_url=os.getenv("RUNPOD_API_BASE_URL"),
-    model=os.getenv("RUNPOD_MODEL_NAME", "gpt-4o"),
-)
-
-Settings.embed_model = HuggingFaceEmbedding(
-    model_name="BAAI/bge-small-en-v1.5",
-    device="cpu",
-    embed_batch_size=100
-)
+# collection_dict is fixed at import, so the formatted prompt only needs building once
+_SYSTEM_PROMPT_FORMATTED = SYSTEM_PROMPT.format(collections=format_collections_for_prompt(collection_dict))
 
 class EventTrackingContext:
     """Context manager for tracking events during agent execution."""
@@ -194,41 +179,36 @@ enhanced_tools = [
     query_odpc_with_events
 ]
 
-def generate_agent_with_events() -> Agent[None, Output]:
+@lru_cache(maxsize=1)
+def generate_agent_with_events() -> "Agent[None, Output]":
     """
     Generate an agent for the OpenAI model with event tracking support.
     
+    The agent holds no per-request state, so it is built once and reused.
+    
     Returns:
         Initialized agent with enhanced tools
     """
     logger.info("Starting agent creation process with event tracking")
+    from pydantic_ai import Agent
+    
     
     if os.getenv("GROQ_MODEL_NAME") is None:
         logger.info("Creating OpenAI-based agent with events (GROQ_MODEL_NAME not set)")
         
-        # Format collections in a readable way (collection name as key instead of ID)
-        if collection_dict:
-            readable_collections = {}
-            for cid, info in collection_dict.items():
-                collection_name = info.get("collection_name", cid)
-                readable_collections[collection_name] = {
-                    "description": info.get("collection_description", "")
-                }
-            collection_yml = yaml.dump(readable_collections, default_flow_style=False)
-            logger.debug(f"Collections configuration: {len(collection_dict)} collections loaded")
-        else:
-            collection_yml = "No collections available"
-            logger.debug("No collections available")
+        logger.debug(f"Collections configuration: {len(collection_dict or {})} collections loaded")
         
         # Initialize the agent with the system prompt and enhanced tools
         agent = Agent(
             model='openai:gpt-4o',
-            system_prompt=SYSTEM_PROMPT.format(collections=collection_yml),
+            system_prompt=_SYSTEM_PROMPT_FORMATTED,
             tools=enhanced_tools,
             output_type=Output
         )
         logger.info("Successfully created OpenAI agent with events and model 'gpt-4o'")
     else:
+        from pydantic_ai.models.groq import GroqModel
+        from pydantic_ai.providers.groq import GroqProvider
         groq_model_name = os.getenv('GROQ_MODEL_NAME', 'llama-3.3-70b-versatile')
         logger.info(f"Creating Groq-based agent with events and model: {groq_model_name}")
         model = GroqModel(
@@ -237,7 +217,7 @@ def generate_agent_with_events() -> Agent[None, Output]:
         )
         agent = Agent(
             model=model,
-            system_prompt=SYSTEM_PROMPT,
+            system_prompt=_SYSTEM_PROMPT_FORMATTED,
             tools=enhanced_tools,
             output_type=Output
         )
@@ -247,41 +227,36 @@ def generate_agent_with_events() -> Agent[None, Output]:
     return agent
 
 # Fallback to original agent if events are not needed
-def generate_agent() -> Agent[None, Output]:
+@lru_cache(maxsize=1)
+def generate_agent() -> "Agent[None, Output]":
     """
     Generate an agent for the OpenAI model with the original tools.
     
+    The agent holds no per-request state, so it is built once and reused.
+    
     Returns:
         Initialized agent
     """
     logger.info("Starting agent creation process")
+    from pydantic_ai import Agent
+    
     
     if os.getenv("GROQ_MODEL_NAME") is None:
         logger.info("Creating OpenAI-based agent (GROQ_MODEL_NAME not set)")
         
-        # Format collections in a readable way (collection name as key instead of ID)
-        if collection_dict:
-            readable_collections = {}
-            for cid, info in collection_dict.items():
-                collection_name = info.get("collection_name", cid)
-                readable_collections[collection_name] = {
-                    "description": info.get("collection_description", "")
-                }
-            collection_yml = yaml.dump(readable_collections, default_flow_style=False)
-            logger.debug(f"Collections configuration: {len(collection_dict)} collections loaded")
-        else:
-            collection_yml = "No collections available"
-            logger.debug("No collections available")
+        logger.debug(f"Collections configuration: {len(collection_dict or {})} collections loaded")
         
         # Initialize the agent with the system prompt and original tools
         agent = Agent(
             model='openai:gpt-4o',
-            system_prompt=SYSTEM_PROMPT.format(collections=collection_yml),
+            system_prompt=_SYSTEM_PROMPT_FORMATTED,
             tools=tools,
             output_type=Output
         )
         logger.info("Successfully created OpenAI agent with model 'gpt-4o'")
     else:
+        from pydantic_ai.models.groq import GroqModel
+        from pydantic_ai.providers.groq import GroqProvider
         groq_model_name = os.getenv('GROQ_MODEL_NAME', 'llama-3.3-70b-versatile')
         logger.info(f"Creating Groq-based pydantic agent with model: {groq_model_name}")
         model = GroqModel(
@@ -290,7 +265,7 @@ def generate_agent() -> Agent[None, Output]:
         )
         agent = Agent(
             model=model,
-            system_prompt=SYSTEM_PROMPT,
+            system_prompt=_SYSTEM_PROMPT_FORMATTED,
             tools=tools,
             output_type=Output
         )
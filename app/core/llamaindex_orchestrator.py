@@ -3,40 +3,41 @@ LlamaIndex FunctionAgent implementation to replace Pydantic-AI.
 """
 
 import os
-import yaml
+import time
+import asyncio
 import logging
-from typing import List, Optional, Any, Dict, Union, Callable
+import importlib.util
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Any, AsyncIterator, Dict, Tuple, Union, Callable
 from contextvars import ContextVar
 from dotenv import load_dotenv
 
 from llama_index.core import Settings
-from llama_index.core.agent.workflow import FunctionAgent
+from llama_index.core.agent.workflow import FunctionAgent, AgentStream
 from llama_index.core.tools import FunctionTool
 from llama_index.core.base.llms.types import ChatMessage
-from llama_index.llms.openai import OpenAI
-from llama_index.llms.groq import Groq
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.core.schema import QueryBundle
 from pydantic import BaseModel, Field
 
-from app.utils.prompts import SYSTEM_PROMPT
+from app.utils.prompts import SYSTEM_PROMPT, format_collections_for_prompt
 from app.utils.fallbacks import get_no_answer_message, get_out_of_scope_message
-from app.core.rag.tool_loader import collection_dict, get_index_dict, get_alias_map
+from app.utils.token_counter import count_tokens, estimate_prompt_tokens
+from app.core.rag.tool_loader import collection_dict, get_index_dict, get_alias_map, get_retriever
+from app.core.semantic_cache import (
+    SEMANTIC_CACHE_ENABLED,
+    RETRIEVAL_CACHE_ENABLED,
+    answer_cache,
+    retrieval_cache,
+)
 from app.utils.chat_event_service import ChatEventService
 from sqlalchemy.ext.asyncio import AsyncSession
 
+if TYPE_CHECKING:
+    import httpx
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
-# Configure Settings
-Settings.embed_model = HuggingFaceEmbedding(
-    model_name="BAAI/bge-small-en-v1.5",
-    device="cpu",
-    embed_batch_size=100
-)
-
 # Context for event tracking (optional; set by run_llamaindex_agent when db/session is provided)
 session_id_context: ContextVar[Optional[str]] = ContextVar('session_id', default=None)
 db_context: ContextVar[Optional[AsyncSession]] = ContextVar('db', default=None)
@@ -58,20 +59,92 @@ async def _emit_event(event_type: str, event_status: str, event_data: Optional[D
         # Do not fail agent flow due to telemetry
         logger.debug(f"Event emit skipped/error: {e}")
 
-# Configure LLM based on environment
-if os.getenv("GROQ_MODEL_NAME") is None:
-    Settings.llm = OpenAI(
-        model="gpt-4o-mini",
-        api_key=os.getenv("OPENAI_API_KEY")
-    )
-    logger.info("Using OpenAI model: gpt-4o-mini")
-else:
-    groq_model_name = os.getenv('GROQ_MODEL_NAME', 'llama-3.3-70b-versatile')
-    Settings.llm = Groq(
-        model=groq_model_name, 
-        api_key=os.getenv("GROQ_API_KEY")
-    )
-    logger.info(f"Using Groq model: {groq_model_name}")
+# Minimum interval between streamed answer chunks (set to 0 to stream every token)
+STREAM_FLUSH_INTERVAL = float(os.getenv("STREAM_FLUSH_INTERVAL_MS", "75")) / 1000
+
+
+# Upper bound on retriever tool calls in flight across all agent runs; tool calls
+# within a turn (and query_multiple_collections) run concurrently up to this cap
+MAX_CONCURRENT_TOOLS = int(os.getenv("MAX_CONCURRENT_TOOLS", "32"))
+_tool_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TOOLS)
+
+
+# Shared async HTTP client for LLM calls so connections are pooled and kept
+# alive across requests instead of re-handshaking on every agent run
+_llm_http_client: Optional["httpx.AsyncClient"] = None
+
+
+def _get_llm_http_client() -> "httpx.AsyncClient":
+    """Return the process-wide async HTTP client used by the LLM, creating it on first use."""
+    global _llm_http_client
+    if _llm_http_client is None:
+        import httpx
+        # HTTP/2 needs the optional h2 package; fall back to pooled HTTP/1.1 without it
+        http2 = importlib.util.find_spec("h2") is not None
+        _llm_http_client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "64")),
+                max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "32")),
+            ),
+            timeout=httpx.Timeout(float(os.getenv("LLM_HTTP_TIMEOUT", "60"))),
+        )
+        logger.info(f"Created shared LLM HTTP client (http2={http2})")
+    return _llm_http_client
+
+
+async def close_llm_http_client() -> None:
+    """
+    Close the shared LLM HTTP client; call on application shutdown.
+    
+    Settings and the shared agents are reset as well, so the next
+    _init_settings() (e.g. in a later lifespan in the same process) builds the
+    LLM around a fresh client instead of keeping the closed one.
+    """
+    global _llm_http_client
+    client, _llm_http_client = _llm_http_client, None
+    _init_settings.cache_clear()
+    # Imported here: both modules import this one
+    from app.core.orchestrator import reset_li_agent
+    from app.core.compatibility_orchestrator import reset_compatibility_agent
+    reset_li_agent()
+    reset_compatibility_agent()
+    if client is not None:
+        await client.aclose()
+
+
+@lru_cache(maxsize=1)
+def _init_settings() -> None:
+    """
+    Configure the global LlamaIndex Settings on first use.
+    
+    The LLM client packages are imported here rather than at module level so
+    importing this module (e.g. from tests or CLI scripts) stays cheap.
+    """
+    load_dotenv()
+    
+    # Share the retriever's local embedding model
+    from app.core.rag.embeddings import get_embed_model
+    Settings.embed_model = get_embed_model()
+    
+    # Configure LLM based on environment
+    if os.getenv("GROQ_MODEL_NAME") is None:
+        from llama_index.llms.openai import OpenAI
+        Settings.llm = OpenAI(
+            model="gpt-4o-mini",
+            api_key=os.getenv("OPENAI_API_KEY"),
+            async_http_client=_get_llm_http_client(),
+        )
+        logger.info("Using OpenAI model: gpt-4o-mini")
+    else:
+        from llama_index.llms.groq import Groq
+        groq_model_name = os.getenv('GROQ_MODEL_NAME', 'llama-3.3-70b-versatile')
+        Settings.llm = Groq(
+            model=groq_model_name, 
+            api_key=os.getenv("GROQ_API_KEY"),
+            async_http_client=_get_llm_http_client(),
+        )
+        logger.info(f"Using Groq model: {groq_model_name}")
 
 
 class Source(BaseModel):
@@ -119,161 +192,10 @@ class Output(BaseModel):
     recommended_follow_up_questions: List[FollowUpQuestion] = Field(default_factory=list)
 
 
-# Tool functions for LlamaIndex FunctionAgent
-async def query_kfc_tool(query: str) -> str:
-    """
-    Query the Kenya Film Commission collection for information about film industry services and support.
-    
-    Args:
-        query: Search query related to Kenya Film Commission
-        
-    Returns:
-        Formatted response with relevant information and sources
-    """
-    logger.info(f"Querying Kenya Film Commission with: {query}")
-    
-    try:
-        await _emit_event("tool_search_documents", "started", {"collection": "kfc"})
-        indexes = get_index_dict()
-        index = indexes["kfc"]
-        retriever = index.as_retriever(similarity_top_k=3)
-        nodes = await retriever.aretrieve(query)
-
-        if not nodes:
-            await _emit_event("tool_search_documents", "completed", {"collection": "kfc", "count": 0})
-            return "No relevant information found in the Kenya Film Commission collection."
-
-        # Format response with sources
-        response_parts = []
-        sources = []
-
-        for i, node in enumerate(nodes[:3]):  # Limit to top 3 results
-            response_parts.append(f"Source {i+1}: {node.text[:500]}...")
-            sources.append({
-                "title": f"KFC Document {i+1}",
-                "content": node.text,
-                "score": node.score if hasattr(node, 'score') else 0.0
-            })
-
-        formatted_response = "\n\n".join(response_parts)
-        await _emit_event("tool_search_documents", "completed", {"collection": "kfc", "count": len(nodes)})
-        return f"Kenya Film Commission Information:\n\n{formatted_response}"
-
-    except Exception as e:
-        logger.error(f"Error querying KFC: {e}")
-        await _emit_event("tool_search_documents", "failed", {"collection": "kfc", "error": str(e)})
-        return f"Error retrieving information from Kenya Film Commission: {str(e)}"
-
-
-async def query_kfcb_tool(query: str) -> str:
-    """
-    Query the Kenya Film Classification Board collection for film regulation and classification information.
-    
-    Args:
-        query: Search query related to Kenya Film Classification Board
-        
-    Returns:
-        Formatted response with relevant information and sources
-    """
-    logger.info(f"Querying Kenya Film Classification Board with: {query}")
-    
-    try:
-        await _emit_event("tool_search_documents", "started", {"collection": "kfcb"})
-        indexes = get_index_dict()
-        index = indexes["kfcb"]
-        retriever = index.as_retriever(similarity_top_k=3)
-        nodes = await retriever.aretrieve(query)
-
-        if not nodes:
-            await _emit_event("tool_search_documents", "completed", {"collection": "kfcb", "count": 0})
-            return "No relevant information found in the Kenya Film Classification Board collection."
-
-        response_parts = []
-        for i, node in enumerate(nodes[:3]):
-            response_parts.append(f"Source {i+1}: {node.text[:500]}...")
-
-        formatted_response = "\n\n".join(response_parts)
-        await _emit_event("tool_search_documents", "completed", {"collection": "kfcb", "count": len(nodes)})
-        return f"Kenya Film Classification Board Information:\n\n{formatted_response}"
-
-    except Exception as e:
-        logger.error(f"Error querying KFCB: {e}")
-        await _emit_event("tool_search_documents", "failed", {"collection": "kfcb", "error": str(e)})
-        return f"Error retrieving information from Kenya Film Classification Board: {str(e)}"
-
-
-async def query_brs_tool(query: str) -> str:
-    """
-    Query the Business Registration Service collection for business registration information.
-    
-    Args:
-        query: Search query related to Business Registration Service
-        
-    Returns:
-        Formatted response with relevant information and sources
-    """
-    logger.info(f"Querying Business Registration Service with: {query}")
-    
-    try:
-        await _emit_event("tool_search_documents", "started", {"collection": "brs"})
-        indexes = get_index_dict()
-        index = indexes["brs"]
-        retriever = index.as_retriever(similarity_top_k=3)
-        nodes = await retriever.aretrieve(query)
-
-        if not nodes:
-            await _emit_event("tool_search_documents", "completed", {"collection": "brs", "count": 0})
-            return "No relevant information found in the Business Registration Service collection."
-
-        response_parts = []
-        for i, node in enumerate(nodes[:3]):
-            response_parts.append(f"Source {i+1}: {node.text[:500]}...")
-
-        formatted_response = "\n\n".join(response_parts)
-        await _emit_event("tool_search_documents", "completed", {"collection": "brs", "count": len(nodes)})
-        return f"Business Registration Service Information:\n\n{formatted_response}"
-
-    except Exception as e:
-        logger.error(f"Error querying BRS: {e}")
-        await _emit_event("tool_search_documents", "failed", {"collection": "brs", "error": str(e)})
-        return f"Error retrieving information from Business Registration Service: {str(e)}"
-
-
-async def query_odpc_tool(query: str) -> str:
-    """
-    Query the Office of the Data Protection Commissioner collection for data protection information.
-    
-    Args:
-        query: Search query related to Office of the Data Protection Commissioner
-        
-    Returns:
-        Formatted response with relevant information and sources
-    """
-    logger.info(f"Querying Office of the Data Protection Commissioner with: {query}")
-    
-    try:
-        await _emit_event("tool_search_documents", "started", {"collection": "odpc"})
-        indexes = get_index_dict()
-        index = indexes["odpc"]
-        retriever = index.as_retriever(similarity_top_k=3)
-        nodes = await retriever.aretrieve(query)
-
-        if not nodes:
-            await _emit_event("tool_search_documents", "completed", {"collection": "odpc", "count": 0})
-            return "No relevant information found in the Office of the Data Protection Commissioner collection."
-
-        response_parts = []
-        for i, node in enumerate(nodes[:3]):
-            response_parts.append(f"Source {i+1}: {node.text[:500]}...")
-
-        formatted_response = "\n\n".join(response_parts)
-        await _emit_event("tool_search_documents", "completed", {"collection": "odpc", "count": len(nodes)})
-        return f"Office of the Data Protection Commissioner Information:\n\n{formatted_response}"
-
-    except Exception as e:
-        logger.error(f"Error querying ODPC: {e}")
-        await _emit_event("tool_search_documents", "failed", {"collection": "odpc", "error": str(e)})
-        return f"Error retrieving information from Office of the Data Protection Commissioner: {str(e)}"
+# Build the validators once at import instead of on the first response
+for _model in (UsageDetails, Usage, Source, FollowUpQuestion, Output):
+    _model.model_rebuild()
+del _model
 
 
 def create_llamaindex_tools(agencies: Optional[Union[str, List[str]]] = None) -> List[FunctionTool]:
@@ -313,10 +235,24 @@ def create_llamaindex_tools(agencies: Optional[Union[str, List[str]]] = None) ->
             try:
                 # Emit started event for dynamic tools
                 await _emit_event("tool_search_documents", "started", {"collection": key})
-                indexes = get_index_dict()
-                index = indexes[key]
-                retriever = index.as_retriever(similarity_top_k=3)
-                nodes = await retriever.aretrieve(query)
+                retriever = get_retriever(key)
+                if retriever is None:
+                    raise KeyError(key)
+                # Embedded in a worker thread, batched with any concurrent tool
+                # calls' queries; the retriever reuses it instead of embedding again
+                query_embedding = await Settings.embed_model.aget_query_embedding(query)
+                if RETRIEVAL_CACHE_ENABLED:
+                    cached = retrieval_cache.lookup(key, query_embedding)
+                    if cached is not None:
+                        await _emit_event("tool_search_documents", "completed", {"collection": key, "cache": "hit"})
+                        return cached
+                async with _tool_semaphore:
+                    # ChromaVectorStore's aquery just calls the blocking HttpClient
+                    # query, so aretrieve would run it on the event loop; run the
+                    # retrieval in a worker thread
+                    nodes = await asyncio.to_thread(
+                        retriever.retrieve, QueryBundle(query_str=query, embedding=query_embedding)
+                    )
                 if not nodes:
                     await _emit_event("tool_search_documents", "completed", {"collection": key, "count": 0})
                     return f"No relevant information found in the {display_name} collection."
@@ -325,7 +261,10 @@ def create_llamaindex_tools(agencies: Optional[Union[str, List[str]]] = None) ->
                     text = getattr(node, "text", "")
                     parts.append(f"Source {i+1}: {text[:500]}...")
                 await _emit_event("tool_search_documents", "completed", {"collection": key, "count": len(nodes)})
-                return f"{display_name} Information:\n\n" + "\n\n".join(parts)
+                result = f"{display_name} Information:\n\n" + "\n\n".join(parts)
+                if RETRIEVAL_CACHE_ENABLED:
+                    retrieval_cache.store(key, query_embedding, result)
+                return result
             except Exception as e:
                 logger.error(f"Error querying {display_name} ({key}): {e}")
                 await _emit_event("tool_search_documents", "failed", {"collection": key, "error": str(e)})
@@ -335,6 +274,7 @@ def create_llamaindex_tools(agencies: Optional[Union[str, List[str]]] = None) ->
 
     # Construct all available tools
     dynamic_tools: Dict[str, FunctionTool] = {}
+    query_fns: Dict[str, Callable[[str], Any]] = {}
     for cid, info in meta.items():
         canonical = str(cid)
         display = info.get("collection_name") or info.get("name") or canonical
@@ -351,6 +291,7 @@ def create_llamaindex_tools(agencies: Optional[Union[str, List[str]]] = None) ->
             desc = f"Query the {display} collection for information relevant to its domain."
         
         dynamic_tools[handle] = FunctionTool.from_defaults(async_fn=async_fn, name=tool_name, description=desc)
+        query_fns[handle] = async_fn
 
     # Maintain legacy aliases explicitly if they exist in index dict (ensures backwards compat)
     for alias in ["kfc", "kfcb", "brs", "odpc"]:
@@ -365,6 +306,7 @@ def create_llamaindex_tools(agencies: Optional[Union[str, List[str]]] = None) ->
                 name=f"query_{alias}",
                 description=f"Query the {display} collection."
             )
+            query_fns[alias] = async_fn
 
     # Filtering logic
     def _resolve_to_handle(token: str) -> Optional[str]:
@@ -417,6 +359,28 @@ def create_llamaindex_tools(agencies: Optional[Union[str, List[str]]] = None) ->
         logger.warning(f"Invalid agencies parameter type: {type(agencies)}. Returning all tools.")
         selected = list(dynamic_tools.values())
 
+    # Cross-collection tool: retrieves from several collections concurrently in one call
+    # instead of the agent issuing one sequential tool call per collection.
+    if len(selected) > 1:
+        selected_handles = [h for h, t in dynamic_tools.items() if t in selected]
+
+        async def _query_multiple(query: str, collections: Optional[List[str]] = None) -> str:
+            handles = [h for h in (collections or []) if h in selected_handles] or selected_handles
+            results = await asyncio.gather(*(query_fns[h](query) for h in handles))
+            return "\n\n".join(results)
+
+        selected.append(
+            FunctionTool.from_defaults(
+                async_fn=_query_multiple,
+                name="query_multiple_collections",
+                description=(
+                    "Query several collections at once with the same query. Prefer this over calling "
+                    "several query_* tools when a question spans more than one agency. "
+                    f"collections: optional subset of {selected_handles}; defaults to all of them."
+                ),
+            )
+        )
+
     logger.info(f"Created {len(selected)} dynamic FunctionTools for agencies: {agencies}")
     return selected
 
@@ -522,6 +486,25 @@ def build_system_prompt(agencies: Optional[Union[str, List[str]]] = None) -> str
     return prompt
 
 
+# Format collections in a readable way (collection name as key instead of ID).
+# collection_dict is bound at import, so this only needs rendering once.
+_COLLECTIONS_TEXT = format_collections_for_prompt(collection_dict)
+
+
+@lru_cache(maxsize=256)
+def _formatted_system_prompt(agencies_key: Optional[Union[str, Tuple[str, ...]]]) -> str:
+    """
+    Build the fully formatted system prompt for an agency filter.
+    
+    Cached per filter (lists are passed as tuples) so repeated requests for the
+    same agencies skip prompt assembly. The collections block is substituted with
+    str.replace so braces in collection names or descriptions cannot break formatting.
+    """
+    agencies = list(agencies_key) if isinstance(agencies_key, tuple) else agencies_key
+    base_prompt = build_system_prompt(agencies)
+    return base_prompt.replace("{collections}", _COLLECTIONS_TEXT)
+
+
 def generate_llamaindex_agent(agencies: Optional[Union[str, List[str]]] = None) -> FunctionAgent:
     """
     Generate a LlamaIndex FunctionAgent with tools and system prompt.
@@ -535,6 +518,8 @@ def generate_llamaindex_agent(agencies: Optional[Union[str, List[str]]] = None)
     Returns:
         Initialized FunctionAgent
     """
+    _init_settings()
+    
     logger.info("=" * 80)
     logger.info("Starting LlamaIndex FunctionAgent creation process")
     
@@ -554,28 +539,14 @@ def generate_llamaindex_agent(agencies: Optional[Union[str, List[str]]] = None)
     logger.info(f"Created {len(tools)} tool(s): {[tool.metadata.name for tool in tools]}")
     
     # Build and format the system prompt with agency-specific name/context
-    base_prompt = build_system_prompt(agencies)
-    
-    # Format collections in a readable way (collection name as key instead of ID)
-    if collection_dict:
-        readable_collections = {}
-        for cid, info in collection_dict.items():
-            collection_name = info.get("collection_name", cid)
-            readable_collections[collection_name] = {
-                "description": info.get("collection_description", "")
-            }
-        collections_text = yaml.dump(readable_collections, default_flow_style=False)
-    else:
-        collections_text = "No collections available"
-    
-    formatted_system_prompt = base_prompt.format(collections=collections_text)
+    agencies_key = tuple(agencies) if isinstance(agencies, list) else agencies
+    formatted_system_prompt = _formatted_system_prompt(agencies_key)
     
     # Create the FunctionAgent
     agent = FunctionAgent(
         tools=tools,
         llm=Settings.llm,
         system_prompt=formatted_system_prompt,
-        verbose=True
     )
     
     logger.info(f"✓ LlamaIndex FunctionAgent created successfully for agencies: {agencies}")
@@ -583,24 +554,58 @@ def generate_llamaindex_agent(agencies: Optional[Union[str, List[str]]] = None)
     return agent
 
 
+# Static follow-up suggestions keyed by a phrase that must appear in the answer.
+# Built once at import so requests only reference the shared instances.
+_FOLLOW_UP_RULES: Tuple[Tuple[str, FollowUpQuestion], ...] = (
+    (
+        "Kenya Film Commission",
+        FollowUpQuestion(
+            question="What are the funding opportunities available for filmmakers in Kenya?",
+            relevance_score=0.85
+        ),
+    ),
+    (
+        "Business Registration Service",
+        FollowUpQuestion(
+            question="What documents are required for business registration in Kenya?",
+            relevance_score=0.90
+        ),
+    ),
+    (
+        "Data Protection",
+        FollowUpQuestion(
+            question="What are the penalties for data protection violations in Kenya?",
+            relevance_score=0.88
+        ),
+    ),
+)
+
+
 class LlamaIndexResponseProcessor:
     """Process LlamaIndex agent responses into our expected Output format."""
     
     @staticmethod
-    def process_response(agent_response, retriever_type: str = "unknown", language: Optional[str] = None) -> Output:
+    def process_response(
+        agent_response,
+        retriever_type: str = "unknown",
+        language: Optional[str] = None,
+        request_tokens: int = 0,
+    ) -> Output:
         """
         Convert LlamaIndex agent response to our Output format.
         
         Args:
             agent_response: The response from the LlamaIndex agent
             retriever_type: The type of retriever used
+            request_tokens: Locally estimated prompt tokens for this turn
             
         Returns:
             Output object with structured response data
         """
         # Extract the main response text
         response_text = (str(agent_response) or "").strip()
-        if not response_text:
+        has_answer = bool(response_text)
+        if not has_answer:
             response_text = get_no_answer_message(language)
 
         # Extract sources from the response if available
@@ -608,18 +613,24 @@ class LlamaIndexResponseProcessor:
         # TODO: Implement source extraction logic based on response content
 
         # Generate follow-up questions based on the response
-        follow_up_questions = LlamaIndexResponseProcessor._generate_follow_up_questions(response_text)
+        # (skipped for the canned no-answer message, which never mentions an agency)
+        follow_up_questions = (
+            LlamaIndexResponseProcessor._generate_follow_up_questions(response_text) if has_answer else []
+        )
 
-        # Create usage information (placeholder for now)
-        usage = Usage(
+        # LlamaIndex doesn't expose provider usage, so token counts are local tiktoken estimates
+        # (request_tokens covers the initial prompt, not intermediate tool-call rounds)
+        response_tokens = count_tokens(response_text)
+        # model_construct skips validation: every value here is built locally and already well-typed
+        usage = Usage.model_construct(
             requests=1,
-            request_tokens=0,  # LlamaIndex doesn't expose this easily
-            response_tokens=0,
-            total_tokens=0,
-            details=UsageDetails()
+            request_tokens=request_tokens,
+            response_tokens=response_tokens,
+            total_tokens=request_tokens + response_tokens,
+            details=UsageDetails.model_construct()
         )
 
-        return Output(
+        return Output.model_construct(
             answer=response_text,
             sources=sources,
             confidence=0.8,  # Default confidence score
@@ -633,60 +644,84 @@ class LlamaIndexResponseProcessor:
         """Generate follow-up questions based on the response content."""
         # Basic follow-up question generation
         # This could be enhanced with LLM-based generation
-        follow_up_questions = []
-        
-        if "Kenya Film Commission" in response_text:
-            follow_up_questions.append(
-                FollowUpQuestion(
-                    question="What are the funding opportunities available for filmmakers in Kenya?",
-                    relevance_score=0.85
-                )
-            )
-        
-        if "Business Registration Service" in response_text:
-            follow_up_questions.append(
-                FollowUpQuestion(
-                    question="What documents are required for business registration in Kenya?",
-                    relevance_score=0.90
-                )
-            )
-        
-        if "Data Protection" in response_text:
-            follow_up_questions.append(
-                FollowUpQuestion(
-                    question="What are the penalties for data protection violations in Kenya?",
-                    relevance_score=0.88
-                )
-            )
-        
-        return follow_up_questions
+        return [question for marker, question in _FOLLOW_UP_RULES if marker in response_text]
 
 
-async def run_llamaindex_agent(
-    message: str, 
+def _detect_retriever_type(message: str) -> str:
+    """Determine the retriever type based on message content."""
+    lowered = message.lower()
+    if any(term in lowered for term in ["film", "movie", "cinema"]):
+        if "classification" in lowered or "regulation" in lowered:
+            return "kfcb"
+        return "kfc"
+    if any(term in lowered for term in ["business", "company", "registration"]):
+        return "brs"
+    if any(term in lowered for term in ["data", "privacy", "protection"]):
+        return "odpc"
+    return "general"
+
+
+async def _coalesce_deltas(events: AsyncIterator[Any], interval: float) -> AsyncIterator[str]:
+    """
+    Yield the text of AgentStream events, joined into at most one chunk per interval.
+    
+    The first delta is sent immediately. Later deltas are held until interval
+    has passed since the previous chunk and are then flushed on that deadline,
+    even if no further event arrives, so an upstream stall never holds back
+    text that is already here.
+    """
+    events = events.__aiter__()
+    pending: List[str] = []
+    last_flush = 0.0
+    # Waiting on a task (rather than wait_for on __anext__) lets a deadline pass
+    # without cancelling the read of the next event
+    next_event = asyncio.ensure_future(events.__anext__())
+    try:
+        while True:
+            if pending:
+                timeout = max(0.0, last_flush + interval - time.monotonic())
+                done, _ = await asyncio.wait({next_event}, timeout=timeout)
+                if not done:
+                    yield "".join(pending)
+                    pending.clear()
+                    last_flush = time.monotonic()
+                    continue
+            try:
+                event = await next_event
+            except StopAsyncIteration:
+                break
+            next_event = asyncio.ensure_future(events.__anext__())
+            if isinstance(event, AgentStream) and event.delta:
+                pending.append(event.delta)
+                now = time.monotonic()
+                if now - last_flush >= interval:
+                    yield "".join(pending)
+                    pending.clear()
+                    last_flush = now
+        if pending:
+            yield "".join(pending)
+    finally:
+        next_event.cancel()
+
+
+async def run_llamaindex_agent_stream(
+    message: str,
     chat_history: Optional[List[ChatMessage]] = None,
     session_id: Optional[str] = None,
     agencies: Optional[Union[str, List[str]]] = None,
     language: Optional[str] = None,
     metadata: Optional[Dict[str, Any]] = None,
     db: Optional[AsyncSession] = None
-) -> Output:
+) -> AsyncIterator[Union[str, Output]]:
     """
-    Run the LlamaIndex agent with a message and optional chat history.
+    Run the LlamaIndex agent and stream the answer as it is generated.
     
-    Args:
-        message: User message to process
-        chat_history: Optional chat history as LlamaIndex ChatMessage objects
-        session_id: Optional session ID for tracking
-        agencies: Optional agency filter for tools. Can be:
-                 - None: Uses all available tools
-                 - str: Uses tool for single agency (e.g., "kfc", "kfcb", "brs", "odpc")
-                 - List[str]: Uses tools for multiple agencies
-        
-    Returns:
-        Output object with structured response
+    Yields answer text deltas (str) while the LLM is generating, followed by
+    exactly one Output object carrying the processed final response.
+    Arguments are the same as for run_llamaindex_agent.
     """
     logger.info(f"Running LlamaIndex agent for session {session_id} with agencies: {agencies}")
+    _init_settings()
     # Set context for events if provided
     if db and session_id:
         try:
@@ -697,27 +732,14 @@ async def run_llamaindex_agent(
     # Emit agent invocation start
     await _emit_event("agent_invocation", "started", {"agencies": agencies if agencies is not None else "all"})
     
-    # Create agent with optional agency filtering
-    agent = generate_llamaindex_agent(agencies)
-    
-    # Determine retriever type based on message content
-    retriever_type = "general"
-    if any(term in message.lower() for term in ["film", "movie", "cinema"]):
-        if "classification" in message.lower() or "regulation" in message.lower():
-            retriever_type = "kfcb"
-        else:
-            retriever_type = "kfc"
-    elif any(term in message.lower() for term in ["business", "company", "registration"]):
-        retriever_type = "brs"
-    elif any(term in message.lower() for term in ["data", "privacy", "protection"]):
-        retriever_type = "odpc"
+    retriever_type = _detect_retriever_type(message)
     
     # Basic scope guard: if message appears entirely off-topic, return out-of-scope message
     off_topic_indicators = [
         "recipe", "football", "movie actor", "dating", "stock tips", "crypto pump"
     ]
     if any(t in message.lower() for t in off_topic_indicators):
-        return Output(
+        yield Output(
             answer=get_out_of_scope_message(language=language),
             sources=[],
             confidence=0.0,
@@ -725,32 +747,70 @@ async def run_llamaindex_agent(
             usage=Usage(requests=1, request_tokens=0, response_tokens=0, total_tokens=0),
             recommended_follow_up_questions=[]
         )
+        return
+
+    # Semantic cache: only stateless turns (no chat history) are cacheable
+    cache_embedding = None
+    cache_namespace = None
+    if SEMANTIC_CACHE_ENABLED and not chat_history:
+        try:
+            cache_namespace = (tuple(agencies) if isinstance(agencies, list) else agencies, language)
+            # Runs in a worker thread (batched with concurrent queries), off the event loop
+            cache_embedding = await Settings.embed_model.aget_query_embedding(message)
+            cached = answer_cache.lookup(cache_namespace, cache_embedding)
+            if cached is not None:
+                logger.info(f"Serving semantically cached answer for session {session_id}")
+                await _emit_event("agent_invocation", "completed", {"agencies": agencies if agencies is not None else "all", "cache": "hit"})
+                yield cached.answer
+                # Deep copy so callers editing sources or follow-ups don't change the cached entry
+                yield cached.model_copy(deep=True)
+                return
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            cache_embedding = None
+
+    # Create agent with optional agency filtering
+    agent = generate_llamaindex_agent(agencies)
 
     try:
         # Run the agent
         if chat_history:
             # If we have chat history, we need to add the current message
             current_history = chat_history.copy()
-            response = await agent.run(message, chat_history=current_history)
+            handler = agent.run(message, chat_history=current_history)
         else:
-            response = await agent.run(message)
+            handler = agent.run(message)
+
+        # Coalesce token deltas so callers get one chunk per flush interval
+        # rather than one per token
+        async for chunk in _coalesce_deltas(handler.stream_events(), STREAM_FLUSH_INTERVAL):
+            yield chunk
+
+        response = await handler
 
         logger.info(f"LlamaIndex agent response received for session {session_id} : {response}")
 
         # Process the response into our expected format
+        request_tokens = estimate_prompt_tokens(
+            _formatted_system_prompt(tuple(agencies) if isinstance(agencies, list) else agencies),
+            (str(m.content) for m in chat_history or [] if m.content),
+            message,
+        )
         processed_response = LlamaIndexResponseProcessor.process_response(
-            response, retriever_type=retriever_type, language=language
+            response, retriever_type=retriever_type, language=language, request_tokens=request_tokens
         )
 
         logger.info(f"Successfully processed LlamaIndex agent response for session {session_id}")
         await _emit_event("agent_invocation", "completed", {"agencies": agencies if agencies is not None else "all"})
-        return processed_response
+
+        if cache_embedding is not None:
+            answer_cache.store(cache_namespace, cache_embedding, processed_response.model_copy(deep=True))
 
     except Exception as e:
         logger.error(f"Error running LlamaIndex agent: {e}")
         await _emit_event("agent_invocation", "failed", {"error": str(e), "agencies": agencies if agencies is not None else "all"})
         # Return error response in expected format
-        return Output(
+        processed_response = Output(
             answer=f"I apologize, but I encountered an error while processing your request: {str(e)}",
             sources=[],
             confidence=0.0,
@@ -759,54 +819,135 @@ async def run_llamaindex_agent(
             recommended_follow_up_questions=[]
         )
 
+    yield processed_response
 
-if __name__ == "__main__":
-    import asyncio
+
+async def run_llamaindex_agent(
+    message: str, 
+    chat_history: Optional[List[ChatMessage]] = None,
+    session_id: Optional[str] = None,
+    agencies: Optional[Union[str, List[str]]] = None,
+    language: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    db: Optional[AsyncSession] = None
+) -> Output:
+    """
+    Run the LlamaIndex agent with a message and optional chat history.
+    
+    Args:
+        message: User message to process
+        chat_history: Optional chat history as LlamaIndex ChatMessage objects
+        session_id: Optional session ID for tracking
+        agencies: Optional agency filter for tools. Can be:
+                 - None: Uses all available tools
+                 - str: Uses tool for single agency (e.g., "kfc", "kfcb", "brs", "odpc")
+                 - List[str]: Uses tools for multiple agencies
+        
+    Returns:
+        Output object with structured response
+    """
+    output: Optional[Output] = None
+    async for item in run_llamaindex_agent_stream(
+        message,
+        chat_history=chat_history,
+        session_id=session_id,
+        agencies=agencies,
+        language=language,
+        metadata=metadata,
+        db=db,
+    ):
+        if isinstance(item, Output):
+            output = item
+    return output
+
+
+async def run_llamaindex_agents_batched(
+    queries: List[Tuple[str, Optional[Union[str, List[str]]]]],
+    session_id: Optional[str] = None,
+    language: Optional[str] = None,
+    max_concurrent_requests: int = 32,
+) -> List[Output]:
+    """
+    Run several independent single-turn queries concurrently.
     
+    Args:
+        queries: (message, agencies) pairs; agencies follows run_llamaindex_agent
+        session_id: Optional prefix; each query runs as "<session_id>-<index>"
+        language: Optional response language applied to every query
+        max_concurrent_requests: Cap on agent runs in flight at once
+        
+    Returns:
+        Output objects in the same order as queries
+    """
+    semaphore = asyncio.Semaphore(max_concurrent_requests)
+
+    async def _run(index: int, message: str, agencies: Optional[Union[str, List[str]]]) -> Output:
+        async with semaphore:
+            return await run_llamaindex_agent(
+                message,
+                session_id=f"{session_id}-{index}" if session_id else None,
+                agencies=agencies,
+                language=language,
+            )
+
+    return list(await asyncio.gather(
+        *(_run(i, message, agencies) for i, (message, agencies) in enumerate(queries))
+    ))
+
+
+async def warmup() -> None:
+    """
+    Load lazily-initialized resources before the first request.
+    
+    Configures Settings (LLM client + embedding model), runs one embedding so the
+    model weights are paged in, and primes the tiktoken encoding. When WARMUP_LLM
+    is true it also sends a 1-token completion to open the pooled LLM connection
+    (this is a billed request, so it is off by default).
+    """
+    try:
+        _init_settings()
+        await Settings.embed_model.aget_text_embedding("warmup")
+        count_tokens("warmup")
+        if os.getenv("WARMUP_LLM", "false").lower() == "true":
+            await Settings.llm.acomplete("ping", max_tokens=1)
+        logger.info("LlamaIndex agent warmup complete")
+    except Exception as e:
+        logger.warning(f"LlamaIndex agent warmup failed: {e}")
+
+
+if __name__ == "__main__":
     async def test_llamaindex_agent():
         """Test the LlamaIndex agent implementation."""
         
-        # Test basic functionality with all tools
-        print("=== Testing with all tools ===")
-        response = await run_llamaindex_agent(
-            "What services does the Kenya Film Commission provide?",
-            session_id="test-session"
+        # The agency-filter scenarios are independent, so run them as one batch
+        response, response_single, response_multiple, response_invalid = await run_llamaindex_agents_batched(
+            [
+                # Test basic functionality with all tools
+                ("What services does the Kenya Film Commission provide?", None),
+                # Test with single agency filter
+                ("What funding is available for filmmakers?", "kfc"),
+                # Test with multiple agencies filter
+                ("What are the data protection requirements for businesses?", ["brs", "odpc"]),
+                # Test with invalid agency (should fallback to all tools)
+                ("General government information", "invalid_agency"),
+            ],
+            session_id="test-session",
         )
         
+        print("=== Testing with all tools ===")
         print("Response:", response.answer)
         print("Sources:", len(response.sources))
         print("Confidence:", response.confidence)
         print("Retriever Type:", response.retriever_type)
         print("Follow-up Questions:", [q.question for q in response.recommended_follow_up_questions])
         
-        # Test with single agency filter
         print("\n=== Testing with single agency (kfc) ===")
-        response_single = await run_llamaindex_agent(
-            "What funding is available for filmmakers?",
-            session_id="test-session-single",
-            agencies="kfc"
-        )
-        
         print("Response:", response_single.answer)
         
-        # Test with multiple agencies filter
         print("\n=== Testing with multiple agencies (brs, odpc) ===")
-        response_multiple = await run_llamaindex_agent(
-            "What are the data protection requirements for businesses?",
-            session_id="test-session-multiple",
-            agencies=["brs", "odpc"]
-        )
-        
         print("Response:", response_multiple.answer)
         
-        # Test with invalid agency (should fallback to all tools)
         print("\n=== Testing with invalid agency ===")
-        response_invalid = await run_llamaindex_agent(
-            "General government information",
-            session_id="test-session-invalid",
-            agencies="invalid_agency"
-        )
-        
         print("Response:", response_invalid.answer)
         
         # Test with chat history
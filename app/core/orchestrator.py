@@ -3,11 +3,9 @@ Main orchestrator module - now using LlamaIndex FunctionAgent as the primary imp
 This module provides the new LlamaIndex implementation and maintains backward compatibility.
 """
 
-import yaml
-import os
 import logging
 import asyncio
-from typing import List, Optional, Any, Dict, Union
+from typing import Optional, Any, Dict
 
 # Initialize logger first
 logger = logging.getLogger(__name__)
@@ -15,6 +13,7 @@ logger = logging.getLogger(__name__)
 # Import the new LlamaIndex implementation with aliases to avoid conflicts
 from app.core.llamaindex_orchestrator import (
     run_llamaindex_agent,
+    run_llamaindex_agent_stream,
     generate_llamaindex_agent,
     Output as LlamaIndexOutput,
     Source as LlamaIndexSource,
@@ -24,15 +23,7 @@ from app.core.llamaindex_orchestrator import (
 )
 
 # Import compatibility layer
-from app.core.compatibility_orchestrator import CompatibilityAgent
-
-# Legacy imports for backward compatibility
-from app.utils.prompts import SYSTEM_PROMPT
-from app.core.rag.tool_loader import tools, collection_dict
-from llama_index.core import Settings
-from llama_index.llms.openai import OpenAI
-from llama_index.embeddings.openai import OpenAIEmbedding
-from pydantic import BaseModel, Field
+from app.core.compatibility_orchestrator import CompatibilityAgent, get_compatibility_agent
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -54,10 +45,9 @@ def generate_agent(tools=None) -> CompatibilityAgent:
         tools: Legacy parameter (ignored, tools are loaded internally)
         
     Returns:
-        CompatibilityAgent that uses LlamaIndex FunctionAgent
+        Shared CompatibilityAgent that uses LlamaIndex FunctionAgent
     """
-    logger.info("Creating agent with LlamaIndex FunctionAgent backend")
-    return CompatibilityAgent()
+    return get_compatibility_agent()
 
 
 def generate_agent_with_events(tools=None) -> CompatibilityAgent:
@@ -68,10 +58,12 @@ def generate_agent_with_events(tools=None) -> CompatibilityAgent:
         tools: Legacy parameter (ignored, tools are loaded internally)
         
     Returns:
-        CompatibilityAgent that uses LlamaIndex FunctionAgent
+        Shared CompatibilityAgent that uses LlamaIndex FunctionAgent
     """
-    logger.info("Creating agent with event tracking and LlamaIndex FunctionAgent backend")
-    return CompatibilityAgent()
+    return get_compatibility_agent()
+
+
+_li_agent = None
 
 
 def generate_li_agent(tools=None, collection_dict: Optional[Dict[str, Any]] = None):
@@ -83,14 +75,25 @@ def generate_li_agent(tools=None, collection_dict: Optional[Dict[str, Any]] = No
         collection_dict: Collection metadata
         
     Returns:
-        LlamaIndex FunctionAgent instance
+        LlamaIndex FunctionAgent instance (built once and shared; FunctionAgent
+        keeps run state in the per-run workflow context, not on the agent)
     """
-    logger.info("Creating LlamaIndex FunctionAgent directly")
-    return generate_llamaindex_agent()
+    global _li_agent
+    if _li_agent is None:
+        logger.info("Creating LlamaIndex FunctionAgent directly")
+        _li_agent = generate_llamaindex_agent()
+    return _li_agent
+
+
+def reset_li_agent() -> None:
+    """Drop the shared FunctionAgent (and the LLM it holds) so the next call rebuilds it."""
+    global _li_agent
+    _li_agent = None
 
 
 # Expose the new LlamaIndex functions for direct use
 run_agent = run_llamaindex_agent
+run_agent_stream = run_llamaindex_agent_stream
 create_agent = generate_llamaindex_agent
 
 
@@ -99,23 +102,25 @@ if __name__ == "__main__":
     async def main():
         """Test the new LlamaIndex agent implementation."""
         
-        # Test with compatibility wrapper
+        # The two calls are independent, so run them concurrently
         agent = generate_agent()
-        response = await agent.run(
-            "What services does the Kenya Film Commission provide?",
-            session_id="test-session"
+        response, direct_response = await asyncio.gather(
+            # Test with compatibility wrapper
+            agent.run(
+                "What services does the Kenya Film Commission provide?",
+                session_id="test-session"
+            ),
+            # Test direct LlamaIndex usage
+            run_llamaindex_agent(
+                "What are the requirements for business registration in Kenya?",
+                session_id="test-direct"
+            ),
         )
         
         print("Compatibility Response:", response.output.answer)
         print("Sources:", len(response.output.sources))
         print("Confidence:", response.output.confidence)
         
-        # Test direct LlamaIndex usage
-        direct_response = await run_llamaindex_agent(
-            "What are the requirements for business registration in Kenya?",
-            session_id="test-direct"
-        )
-        
         print("\nDirect LlamaIndex Response:", direct_response.answer)
         print("Retriever Type:", direct_response.retriever_type)
         print("Follow-up Questions:", [q.question for q in direct_response.recommended_follow_up_questions])
@@ -0,0 +1,259 @@
+"""
+Shared local embedding model used by the retriever tools and the indexer.
+
+The model is loaded once per process, on CUDA when available (override with
+EMBEDDING_DEVICE and EMBEDDING_BATCH_SIZE). Set EMBEDDING_BACKEND=onnx to run the
+sentence-transformers ONNX export instead of the torch weights, and
+EMBEDDING_ONNX_FILE to pick a specific (e.g. INT8-quantized) ONNX file.
+Query embeddings are memoized in a bounded LRU keyed by a hash of the
+whitespace-normalized query (EMBEDDING_QUERY_CACHE_SIZE, 0 disables), and
+document chunk embeddings by a hash of the chunk text
+(EMBEDDING_TEXT_CACHE_SIZE, 0 disables).
+
+Async query embeddings run in a worker thread. Queries that arrive within
+EMBEDDING_QUERY_BATCH_WINDOW_MS of each other (up to EMBEDDING_QUERY_BATCH_SIZE)
+are embedded together in one model call; a window of 0 embeds each query on
+its own.
+"""
+
+import os
+import asyncio
+import hashlib
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "BAAI/bge-small-en-v1.5")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE")
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE")
+EMBEDDING_BATCH_SIZE = os.getenv("EMBEDDING_BATCH_SIZE")
+
+EMBEDDING_QUERY_CACHE_SIZE = int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE", "4096"))
+EMBEDDING_TEXT_CACHE_SIZE = int(os.getenv("EMBEDDING_TEXT_CACHE_SIZE", "10000"))
+
+EMBEDDING_QUERY_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_QUERY_BATCH_WINDOW_MS", "5"))
+EMBEDDING_QUERY_BATCH_SIZE = int(os.getenv("EMBEDDING_QUERY_BATCH_SIZE", "32"))
+
+
+class _EmbeddingLRU:
+    """Thread-safe bounded LRU of embeddings keyed by a content hash."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # float32 arrays take ~1/20th the memory of lists of Python floats
+        self._entries: "OrderedDict[bytes, array]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[List[float]]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            self._entries.move_to_end(key)
+        return cached.tolist()
+
+    def put(self, key: bytes, embedding: List[float]) -> None:
+        with self._lock:
+            self._entries[key] = array("f", embedding)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+_query_cache = _EmbeddingLRU(EMBEDDING_QUERY_CACHE_SIZE)
+_text_cache = _EmbeddingLRU(EMBEDDING_TEXT_CACHE_SIZE)
+
+
+def _query_cache_key(query: str) -> bytes:
+    return _query_cache.key(" ".join(query.split()))
+
+
+class _QueryEmbeddingBatcher:
+    """
+    Collect concurrent query embeddings for a short window and embed them in one call.
+    
+    The first query of a batch starts a timer; the batch is embedded in a worker
+    thread when the timer fires or max_size queries are waiting, whichever comes
+    first. Must be used from a single event loop at a time.
+    """
+
+    def __init__(self, embed_batch: Callable[[List[str]], List[List[float]]], window: float, max_size: int):
+        self._embed_batch = embed_batch
+        self.window = window
+        self.max_size = max_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[str, "asyncio.Future[List[float]]"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    async def embed(self, query: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Pending work from a previous (closed) loop can never complete
+            self._loop, self._pending, self._timer = loop, [], None
+        future: "asyncio.Future[List[float]]" = loop.create_future()
+        self._pending.append((query, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self._loop.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, "asyncio.Future[List[float]]"]]) -> None:
+        try:
+            embeddings = await asyncio.to_thread(self._embed_batch, [query for query, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), embedding in zip(batch, embeddings):
+            # Callers that were cancelled while waiting already have a done future
+            if not future.done():
+                future.set_result(embedding)
+
+
+@lru_cache(maxsize=1)
+def _cached_embedding_class() -> type:
+    """
+    Build the caching HuggingFaceEmbedding subclass.
+    
+    Defined on first use so importing this module does not pull in
+    sentence-transformers and torch.
+    """
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+    from pydantic import PrivateAttr
+
+    class CachedHuggingFaceEmbedding(HuggingFaceEmbedding):
+        """
+        HuggingFaceEmbedding that reuses embeddings for repeated queries and chunks,
+        and batches concurrent async query embeddings.
+        """
+
+        _query_batcher: Optional[_QueryEmbeddingBatcher] = PrivateAttr(default=None)
+
+        def _get_query_embedding(self, query: str) -> List[float]:
+            if EMBEDDING_QUERY_CACHE_SIZE <= 0:
+                return super()._get_query_embedding(query)
+            key = _query_cache_key(query)
+            cached = _query_cache.get(key)
+            if cached is not None:
+                return cached
+            embedding = super()._get_query_embedding(query)
+            _query_cache.put(key, embedding)
+            return embedding
+
+        def _get_query_embedding_batch(self, queries: List[str]) -> List[List[float]]:
+            # _embed applies the model's query prompt to every input, as the
+            # single-query path does
+            embeddings = self._embed(queries, prompt_name="query")
+            if EMBEDDING_QUERY_CACHE_SIZE > 0:
+                for query, embedding in zip(queries, embeddings):
+                    _query_cache.put(_query_cache_key(query), embedding)
+            return embeddings
+
+        async def _aget_query_embedding(self, query: str) -> List[float]:
+            if EMBEDDING_QUERY_CACHE_SIZE > 0:
+                cached = _query_cache.get(_query_cache_key(query))
+                if cached is not None:
+                    return cached
+            if EMBEDDING_QUERY_BATCH_WINDOW_MS <= 0:
+                return await asyncio.to_thread(self._get_query_embedding, query)
+            if self._query_batcher is None:
+                self._query_batcher = _QueryEmbeddingBatcher(
+                    self._get_query_embedding_batch,
+                    window=EMBEDDING_QUERY_BATCH_WINDOW_MS / 1000,
+                    max_size=EMBEDDING_QUERY_BATCH_SIZE,
+                )
+            return await self._query_batcher.embed(query)
+
+        def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+            # Re-crawled pages and shared boilerplate (nav, footers) produce identical
+            # chunks; only embed the ones not seen before
+            if EMBEDDING_TEXT_CACHE_SIZE <= 0:
+                return super()._get_text_embeddings(texts)
+            keys = [_text_cache.key(text) for text in texts]
+            embeddings: List[Optional[List[float]]] = [_text_cache.get(key) for key in keys]
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            if missing:
+                computed = super()._get_text_embeddings([texts[i] for i in missing])
+                for i, embedding in zip(missing, computed):
+                    embeddings[i] = embedding
+                    _text_cache.put(keys[i], embedding)
+            return embeddings
+
+        async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+            return self._get_text_embeddings(texts)
+
+    return CachedHuggingFaceEmbedding
+
+
+def _resolve_device() -> str:
+    """Use EMBEDDING_DEVICE if set, otherwise CUDA when available, else CPU."""
+    if EMBEDDING_DEVICE:
+        return EMBEDDING_DEVICE
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+
+_embed_model: Optional["HuggingFaceEmbedding"] = None
+_embed_model_lock = threading.Lock()
+
+
+def get_embed_model() -> "HuggingFaceEmbedding":
+    """Return the process-wide embedding model, loading it on first use."""
+    global _embed_model
+    if _embed_model is not None:
+        return _embed_model
+    # Indexing jobs may call this from worker threads; load the model only once
+    with _embed_model_lock:
+        if _embed_model is not None:
+            return _embed_model
+        kwargs: Dict[str, Any] = {}
+        if EMBEDDING_BACKEND == "onnx":
+            kwargs["backend"] = "onnx"
+            if EMBEDDING_ONNX_FILE:
+                kwargs["model_kwargs"] = {"file_name": EMBEDDING_ONNX_FILE}
+
+        device = _resolve_device()
+        batch_size = int(EMBEDDING_BATCH_SIZE or (256 if device.startswith("cuda") else 128))
+
+        logger.info(
+            "Loading embedding model %s (backend=%s, device=%s, batch_size=%s)",
+            EMBEDDING_MODEL_NAME,
+            EMBEDDING_BACKEND,
+            device,
+            batch_size,
+        )
+        _embed_model = _cached_embedding_class()(
+            model_name=EMBEDDING_MODEL_NAME,
+            device=device,
+            embed_batch_size=batch_size,
+            **kwargs,
+        )
+    return _embed_model
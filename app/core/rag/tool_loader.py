@@ -1,11 +1,13 @@
+import asyncio
 import chromadb
 import os
+import threading
 from datetime import datetime, timezone
 from typing import Dict, List, Any, Callable, Optional
-from app.utils.prompts import QUERY_ENGINE_PROMPT
-from llama_index.core import VectorStoreIndex, StorageContext, Settings
+from llama_index.core import VectorStoreIndex, Settings
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.core.schema import NodeWithScore
+from llama_index.core.retrievers import BaseRetriever
 from chromadb.config import Settings as ChromaSettings
 
 # logging
@@ -14,9 +16,11 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from opentelemetry.instrumentation.llamaindex import LlamaIndexInstrumentor
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from app.core.rag.embeddings import get_embed_model
+from app.db.database import get_sync_engine
+from app.core.semantic_cache import retrieval_cache
 
 load_dotenv()
 LlamaIndexInstrumentor().instrument()
@@ -36,50 +40,46 @@ _alias_to_canonical: Dict[str, str] = {}
 
 remote_db: Optional[Any] = None
 
+# Guards for the lazily built module state. Requests served from worker threads
+# could otherwise create duplicate clients or rebuild indexes concurrently.
+_client_lock = threading.Lock()
+_metadata_lock = threading.Lock()
+# Re-entrant: get_index_dict -> load_indexes -> refresh_collection_indexes
+_index_lock = threading.RLock()
+
 
 def get_chroma_client() -> Any:
     global remote_db
-    if remote_db is None:
-        logger.info("Initializing ChromaDB client")
-        user = os.getenv("CHROMA_USERNAME")
-        pwd = os.getenv("CHROMA_PASSWORD")
-        settings = None
-        if user and pwd:
-            settings = ChromaSettings(
-                chroma_client_auth_provider="chromadb.auth.basic_authn.BasicAuthClientProvider",
-                chroma_client_auth_credentials=f"{user}:{pwd}",
+    if remote_db is not None:
+        return remote_db
+    with _client_lock:
+        if remote_db is None:
+            logger.info("Initializing ChromaDB client")
+            user = os.getenv("CHROMA_USERNAME")
+            pwd = os.getenv("CHROMA_PASSWORD")
+            settings = None
+            if user and pwd:
+                settings = ChromaSettings(
+                    chroma_client_auth_provider="chromadb.auth.basic_authn.BasicAuthClientProvider",
+                    chroma_client_auth_credentials=f"{user}:{pwd}",
+                )
+            remote_db = chromadb.HttpClient(
+                host=os.getenv("CHROMA_HOST", "localhost"),
+                port=int(os.getenv("CHROMA_PORT", "8050")),
+                settings=settings,
             )
-        remote_db = chromadb.HttpClient(
-            host=os.getenv("CHROMA_HOST", "localhost"),
-            port=int(os.getenv("CHROMA_PORT", "8050")),
-            settings=settings,
-        )
     return remote_db
 
 
-embed_model = HuggingFaceEmbedding(
-    model_name="BAAI/bge-small-en-v1.5",
-    device="cpu",
-    embed_batch_size=100
-)
-
-
-def _get_sync_db_url() -> Optional[str]:
-    url = os.getenv("DATABASE_URL")
-    if not url:
-        return None
-    return url.replace("+asyncpg", "")
-
-
 def _load_collections_from_db() -> Dict[str, Dict[str, str]]:
-    url = _get_sync_db_url()
-    if not url:
+    # Without a configured database, fall back to the legacy collections
+    if not os.getenv("DATABASE_URL"):
         _alias_to_canonical.clear()
         for k in LEGACY_COLLECTIONS.keys():
             _alias_to_canonical[k] = k
         return dict(LEGACY_COLLECTIONS)
     try:
-        engine = create_engine(url)
+        engine = get_sync_engine()
         with engine.connect() as conn:
             rows = conn.execute(text("SELECT id, name, description FROM collections")).fetchall()
         data: Dict[str, Dict[str, str]] = {}
@@ -112,14 +112,21 @@ def _load_collections_from_db() -> Dict[str, Dict[str, str]]:
 
 def get_collection_metadata() -> Dict[str, Dict[str, str]]:
     global collection_dict
-    if collection_dict is None:
-        collection_dict = _load_collections_from_db()
-        logger.info(f"Loaded {len(collection_dict)} collections for RAG tools")
-    return collection_dict
+    metadata = collection_dict
+    if metadata is not None:
+        return metadata
+    with _metadata_lock:
+        if collection_dict is None:
+            collection_dict = _load_collections_from_db()
+            logger.info(f"Loaded {len(collection_dict)} collections for RAG tools")
+        return collection_dict
 
 
 CollectionIndexHandle = Dict[str, Any]
 
+# Nodes returned per collection query
+SIMILARITY_TOP_K = 3
+
 # Lazy per-collection cache keyed by canonical collection id
 collection_index_handles: Dict[str, CollectionIndexHandle] = {}
 
@@ -131,7 +138,9 @@ def load_indexes() -> Dict[str, VectorStoreIndex]:
 
 def get_index_dict() -> Dict[str, VectorStoreIndex]:
     if not collection_index_handles:
-        load_indexes()
+        with _index_lock:
+            if not collection_index_handles:
+                load_indexes()
 
     index_map: Dict[str, VectorStoreIndex] = {
         canonical_id: handle["index"]
@@ -169,7 +178,14 @@ def refresh_collections(collection_ids: Optional[object] = None) -> Dict[str, Ve
 
 
 def refresh_collection_indexes(collection_id: Optional[str] = None) -> Dict[str, VectorStoreIndex]:
+    with _index_lock:
+        return _refresh_collection_indexes(collection_id)
+
+
+def _refresh_collection_indexes(collection_id: Optional[str] = None) -> Dict[str, VectorStoreIndex]:
     logger.info("Refreshing %sindex cache", "targeted " if collection_id else "global ")
+    # Cached retrieval results may be stale once a collection is re-indexed
+    retrieval_cache.clear()
 
     if collection_id:
         canonical_id = _resolve_collection_identifier(collection_id)
@@ -197,22 +213,33 @@ def refresh_collection_indexes(collection_id: Optional[str] = None) -> Dict[str,
     _reload_collection_metadata()
     collection_index_handles.clear()
     metadata = get_collection_metadata()
+    # Fetch every existing Chroma collection in one round-trip; only missing
+    # ones fall back to get_or_create_collection
+    try:
+        existing = {coll.name: coll for coll in get_chroma_client().list_collections()}
+    except Exception as e:
+        logger.warning(f"Could not list Chroma collections, fetching them one by one: {e}")
+        existing = {}
     for canonical_id in metadata.keys():
-        collection_index_handles[canonical_id] = _build_collection_index_handle(canonical_id)
+        collection_index_handles[canonical_id] = _build_collection_index_handle(
+            canonical_id, existing.get(str(canonical_id))
+        )
 
     return get_index_dict()
 
 
-def _build_collection_index_handle(canonical_id: str) -> CollectionIndexHandle:
-    client: Any = get_chroma_client()
-    chroma_coll = client.get_or_create_collection(name=str(canonical_id))
+def _build_collection_index_handle(canonical_id: str, chroma_coll: Optional[Any] = None) -> CollectionIndexHandle:
+    if chroma_coll is None:
+        client: Any = get_chroma_client()
+        chroma_coll = client.get_or_create_collection(name=str(canonical_id))
     vs = ChromaVectorStore(chroma_collection=chroma_coll)
-    StorageContext.from_defaults(vector_store=vs)
-    index = VectorStoreIndex.from_vector_store(vector_store=vs, embed_model=embed_model)
+    index = VectorStoreIndex.from_vector_store(vector_store=vs, embed_model=get_embed_model())
 
     metadata = get_collection_metadata().get(str(canonical_id), {})
     handle: CollectionIndexHandle = {
         "index": index,
+        # Built once per refresh and reused by every query against the collection
+        "retriever": index.as_retriever(similarity_top_k=SIMILARITY_TOP_K),
         "collection_id": str(canonical_id),
         "collection_name": metadata.get("collection_name"),
         "refreshed_at": datetime.now(timezone.utc).isoformat(),
@@ -254,28 +281,37 @@ def get_alias_map() -> Dict[str, str]:
     return dict(_alias_to_canonical)
 
 
+def get_retriever(identifier: str) -> Optional[BaseRetriever]:
+    """Return the cached retriever for a collection id or alias, if loaded."""
+    if not collection_index_handles:
+        get_index_dict()
+    canonical_id = _resolve_collection_identifier(identifier)
+    handle = collection_index_handles.get(canonical_id) if canonical_id else None
+    return handle["retriever"] if handle else None
+
+
+async def query_collection(identifier: str, query: str) -> List[NodeWithScore]:
+    retriever = get_retriever(identifier)
+    if retriever is None:
+        raise KeyError(identifier)
+    # The Chroma client and embedding model are blocking; keep them off the loop
+    return await asyncio.to_thread(retriever.retrieve, query)
+
+
 async def query_kfc(query: str) -> List[NodeWithScore]:
-    indexes = get_index_dict()
-    retriever = indexes["kfc"].as_retriever()
-    return await retriever.aretrieve(query)
+    return await query_collection("kfc", query)
 
 
 async def query_kfcb(query: str) -> List[NodeWithScore]:
-    indexes = get_index_dict()
-    retriever = indexes["kfcb"].as_retriever()
-    return await retriever.aretrieve(query)
+    return await query_collection("kfcb", query)
 
 
 async def query_brs(query: str) -> List[NodeWithScore]:
-    indexes = get_index_dict()
-    retriever = indexes["brs"].as_retriever()
-    return await retriever.aretrieve(query)
+    return await query_collection("brs", query)
 
 
 async def query_odpc(query: str) -> List[NodeWithScore]:
-    indexes = get_index_dict()
-    retriever = indexes["odpc"].as_retriever()
-    return await retriever.aretrieve(query)
+    return await query_collection("odpc", query)
 
 
 tools: List[Callable] = [query_kfc, query_kfcb, query_brs, query_odpc]
@@ -0,0 +1,85 @@
+"""
+Semantic-similarity caches for agent answers and retrieval results.
+
+Values are stored alongside the (normalized) embedding of the query that
+produced them. A later query whose embedding is close enough to a stored one,
+within the same namespace, is served from the cache. answer_cache namespaces by
+agency filter + language and skips retrieval and the LLM entirely;
+retrieval_cache namespaces by collection and skips the vector store round-trip.
+"""
+
+import os
+import logging
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Bounded in-process cache keyed by embedding similarity within a namespace."""
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 512, max_namespaces: int = 64):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_namespaces = max_namespaces
+        # namespace -> (matrix of unit vectors, values aligned with matrix rows)
+        self._namespaces: "OrderedDict[Hashable, Tuple[np.ndarray, List[Any]]]" = OrderedDict()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, namespace: Hashable, embedding: Sequence[float]) -> Optional[Any]:
+        """Return the cached value most similar to embedding, if above the threshold."""
+        entry = self._namespaces.get(namespace)
+        if entry is None:
+            return None
+        matrix, values = entry
+        scores = matrix @ self._normalize(embedding)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        self._namespaces.move_to_end(namespace)
+        logger.debug(f"Semantic cache hit (score={scores[best]:.3f}) for namespace {namespace}")
+        return values[best]
+
+    def store(self, namespace: Hashable, embedding: Sequence[float], value: Any) -> None:
+        """Add a value under namespace, evicting the oldest entries when full."""
+        vector = self._normalize(embedding)[np.newaxis, :]
+        entry = self._namespaces.get(namespace)
+        if entry is None:
+            matrix, values = vector, [value]
+        else:
+            matrix, values = np.vstack([entry[0], vector]), entry[1] + [value]
+            if len(values) > self.max_entries:
+                matrix, values = matrix[-self.max_entries:], values[-self.max_entries:]
+        self._namespaces[namespace] = (matrix, values)
+        self._namespaces.move_to_end(namespace)
+        while len(self._namespaces) > self.max_namespaces:
+            self._namespaces.popitem(last=False)
+
+    def invalidate(self, namespace: Hashable) -> None:
+        self._namespaces.pop(namespace, None)
+
+    def clear(self) -> None:
+        self._namespaces.clear()
+
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+
+answer_cache = SemanticCache(
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512")),
+)
+
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "false").lower() == "true"
+
+retrieval_cache = SemanticCache(
+    threshold=float(os.getenv("RETRIEVAL_CACHE_THRESHOLD", "0.95")),
+    max_entries=int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "256")),
+)
@@ -4,7 +4,7 @@ Webpage storage model for database records tracking crawled web pages.
 
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, ForeignKey, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -15,6 +15,14 @@ class Webpage(Base):
     Model for tracking crawled webpages.
     """
     __tablename__ = "webpages"    
+    __table_args__ = (
+        # Unindexed pages per collection, scanned by the indexer and crawl gating
+        Index(
+            "ix_webpages_collection_unindexed",
+            "collection_id",
+            postgresql_where=text("is_indexed = false AND content_markdown IS NOT NULL"),
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String(2048), unique=True, nullable=False, index=True)
     title = Column(String(512), nullable=True)
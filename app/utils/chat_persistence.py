@@ -4,7 +4,7 @@ Chat persistence service for storing and retrieving chat history.
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Any, Union
-from sqlalchemy import select, update, and_, delete
+from sqlalchemy import select, update, and_, delete, cast, Text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from uuid import uuid4
@@ -17,6 +17,10 @@ from app.utils.pii import redact_pii
 
 logger = logging.getLogger(__name__)
 
+# ModelMessagesTypeAdapter is already a TypeAdapter; keep one reference so the
+# schema it builds on first use is shared by every save and load
+_MSG_ADAPTER = ModelMessagesTypeAdapter
+
 
 class ChatPersistenceService:
     """Service for storing and retrieving chat history."""
@@ -166,7 +170,7 @@ class ChatPersistenceService:
                 message_id=str(uuid4()),
                 message_type=message_type,
                 message_object=to_jsonable_python(sanitized_object),
-                history=history,
+                history=ChatPersistenceService._serialize_history(history),
                 timestamp=datetime.now(timezone.utc)
             )
             
@@ -203,20 +207,20 @@ class ChatPersistenceService:
                 logger.warning(f"Chat session {session_id} not found when loading history")
                 return None
             
-            # Get the most recent assistant message with history
-            query = select(ChatMessage).where(
+            # Get the most recent assistant message with history, as raw JSON text
+            # so it can be validated straight from JSON
+            query = select(cast(ChatMessage.history, Text)).where(
                 (ChatMessage.chat_id == chat.id) & 
                 (ChatMessage.message_type == 'assistant') & 
                 (ChatMessage.history.isnot(None))
-            ).order_by(ChatMessage.timestamp.desc())
+            ).order_by(ChatMessage.timestamp.desc()).limit(1)
             
             result = await db.execute(query)
-            message = result.scalars().first()
+            raw_history = result.scalars().first()
             
-            if message is not None and message.history is not None:
+            if raw_history is not None:
                 logger.info(f"Found message history for session {session_id}")
-                # Convert history back to ModelMessage format using ModelMessagesTypeAdapter
-                return ModelMessagesTypeAdapter.validate_python(message.history)
+                return ChatPersistenceService._deserialize_history(raw_history)
             
             logger.info(f"No message history found for session {session_id}")
             return None
@@ -225,6 +229,21 @@ class ChatPersistenceService:
             logger.error(f"Error loading message history: {str(e)}")
             return None
     @staticmethod
+    def _serialize_history(history: Optional[List[Any]]) -> Any:
+        """
+        Encode ModelMessage objects straight to JSON bytes, skipping the
+        to_jsonable_python intermediate; lists of plain dicts are stored as given.
+        """
+        if history and not any(isinstance(entry, dict) for entry in history):
+            return _MSG_ADAPTER.dump_json(history)
+        return history
+
+    @staticmethod
+    def _deserialize_history(raw_history: Union[str, bytes]) -> List[Any]:
+        """Convert stored JSON history back to ModelMessage objects."""
+        return _MSG_ADAPTER.validate_json(raw_history)
+
+    @staticmethod
     async def delete_chat_session(db: AsyncSession, session_id: str) -> bool:
         """
         Delete a chat session and all its messages.
@@ -396,7 +415,7 @@ class ChatPersistenceService:
             
             if latest_history:
                 # Convert history back to ModelMessage format
-                return ModelMessagesTypeAdapter.validate_python(latest_history)
+                return _MSG_ADAPTER.validate_python(latest_history)
             
             # If no history found, return empty list
             logger.info(f"No message history found for session {session_id}")
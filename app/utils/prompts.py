@@ -73,4 +73,23 @@ If a query is out-of-scope or ambiguous, use the standardized out-of-scope/fallb
 """
 
 
+def format_collections_for_prompt(collection_dict) -> str:
+    """Render collection metadata for the {collections} placeholder of SYSTEM_PROMPT.
+
+    Produces the same "name:\n  description: ..." layout yaml.dump used to,
+    without pulling PyYAML into the request path. Entries are sorted by name so
+    the prompt is byte-identical across restarts regardless of DB row order,
+    which keeps the LLM provider's prompt-prefix cache effective.
+    """
+    if not collection_dict:
+        return "No collections available"
+    lines = []
+    for cid, info in collection_dict.items():
+        collection_name = info.get("collection_name", cid)
+        description = (info.get("collection_description") or "").replace("\n", " ")
+        lines.append(f"{collection_name}:\n  description: {description}")
+    lines.sort()
+    return "\n".join(lines) + "\n"
+
+
 QUERY_ENGINE_PROMPT = """You answer questions about {collection_name}. {collection_name} has the following description: {collection_description}."""
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Local token counting for usage reporting.
+
+LlamaIndex's FunctionAgent does not surface provider token usage, so request and
+response token counts are estimated locally with tiktoken. Counts for prompt
+pieces that repeat across turns (the formatted system prompt, earlier history
+messages) are memoized by text, so each turn only tokenizes what is new.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER_MODEL = "gpt-4o"
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Return the tiktoken encoding for TOKENIZER_MODEL, or None if unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken is not installed; token usage will be reported as 0")
+        return None
+    try:
+        return tiktoken.encoding_for_model(TOKENIZER_MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Count tokens in text without memoizing (for one-off text such as answers)."""
+    encoding = _get_encoding()
+    if encoding is None or not text:
+        return 0
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=4096)
+def count_tokens_cached(text: str) -> int:
+    """Count tokens in text, memoized for text that recurs across turns."""
+    return count_tokens(text)
+
+
+def estimate_prompt_tokens(system_prompt: str, history: Iterable[Optional[str]], message: str) -> int:
+    """Estimate the tokens sent for a turn: system prompt + prior messages + new message."""
+    return (
+        count_tokens_cached(system_prompt)
+        + sum(count_tokens_cached(content) for content in history if content)
+        + count_tokens(message)
+    )
@@ -50,8 +50,9 @@ async def test_chat_persistence():
         # Step 1: Send an initial message and save the conversation
         logger.info("Step 1: Sending initial message")
         agent = generate_agent()
-        result = agent.run_sync(
-            "What is the role of the Kenya Film Commission in the film industry?"
+        result = await agent.run(
+            "What is the role of the Kenya Film Commission in the film industry?",
+            session_id=session_id
         )
         
         # Log the response
@@ -79,16 +80,18 @@ async def test_chat_persistence():
             logger.error("Failed to load message history")
             return
         
-        # Create a new agent with the message history
-        follow_up_agent = generate_agent(message_history=message_history)
-        
-        # Send a follow-up question
-        follow_up_result = follow_up_agent.run_sync(
-            "Can you elaborate on their support for filmmakers?"
+        # Send a follow-up question with the loaded message history. The same
+        # question without history is independent of it, so run both at once
+        # to show what the history adds
+        follow_up_message = "Can you elaborate on their support for filmmakers?"
+        follow_up_result, baseline_result = await asyncio.gather(
+            agent.run(follow_up_message, message_history=message_history, session_id=session_id),
+            agent.run(follow_up_message),
         )
         
-        # Log the response
+        # Log the responses
         logger.info(f"Follow-up response: {follow_up_result.output.answer[:100]}...")
+        logger.info(f"Same question without history: {baseline_result.output.answer[:100]}...")
         
         # Save only the new messages
         success = await ChatPersistenceService.save_messages(db, session_id, follow_up_result.new_messages())
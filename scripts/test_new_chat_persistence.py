@@ -34,19 +34,20 @@ async def test_chat_persistence():
         # Initialize the agent
         agent = generate_agent()
         
-        # Simulate a user message
+        # Simulate a user message and generate the response. Saving the message
+        # doesn't affect the agent run (which doesn't use db), so do both at once
         user_message = "What is the Kenya Film Commission?"
-        await ChatPersistenceService.save_message(
-            db, 
-            session_id, 
-            "user", 
-            {"query": user_message}
+        _, result = await asyncio.gather(
+            ChatPersistenceService.save_message(
+                db, 
+                session_id, 
+                "user", 
+                {"query": user_message}
+            ),
+            agent.run(user_message, session_id=session_id),
         )
         logger.info(f"Saved user message: {user_message}")
         
-        # Generate a response
-        result = agent.run_sync(user_message)
-        
         # Save the assistant's response
         assistant_message_obj = {
             "session_id": session_id,
@@ -75,16 +76,17 @@ async def test_chat_persistence():
         if loaded_history:
             logger.info(f"Successfully loaded message history")
             
-            # Send a follow-up message with history
+            # Send a follow-up message with history, saving it alongside the run
             follow_up_message = "Tell me more about its role"
-            await ChatPersistenceService.save_message(
-                db, 
-                session_id, 
-                "user", 
-                {"query": follow_up_message}
+            _, result2 = await asyncio.gather(
+                ChatPersistenceService.save_message(
+                    db, 
+                    session_id, 
+                    "user", 
+                    {"query": follow_up_message}
+                ),
+                agent.run(follow_up_message, message_history=loaded_history, session_id=session_id),
             )
-            
-            result2 = agent.run_sync(follow_up_message, message_history=loaded_history)
             logger.info(f"Generated follow-up response with history")
             
             # Save the second assistant response
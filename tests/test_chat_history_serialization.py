@@ -0,0 +1,45 @@
+"""
+Unit tests for chat history serialization in app.utils.chat_persistence.
+"""
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic_ai")
+
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
+
+from app.db.database import _json_serializer
+from app.utils.chat_persistence import ChatPersistenceService
+
+
+def _messages():
+    return [
+        ModelRequest(parts=[UserPromptPart(content="How do I register a business?")]),
+        ModelResponse(parts=[TextPart(content="Apply through the BRS portal.")]),
+    ]
+
+
+def test_model_messages_round_trip_through_json():
+    raw = ChatPersistenceService._serialize_history(_messages())
+
+    assert isinstance(raw, bytes)
+    # The column serializer stores the pre-encoded bytes unchanged
+    stored = _json_serializer(raw)
+    restored = ChatPersistenceService._deserialize_history(stored)
+
+    assert [message.kind for message in restored] == ["request", "response"]
+    assert restored[0].parts[0].content == "How do I register a business?"
+    assert restored[1].parts[0].content == "Apply through the BRS portal."
+
+
+def test_plain_dict_history_is_stored_as_given():
+    history = [{"role": "assistant", "content": "Hello"}]
+
+    assert ChatPersistenceService._serialize_history(history) is history
+    assert ChatPersistenceService._serialize_history(None) is None
+
+
+def test_plain_role_content_history_is_rejected():
+    with pytest.raises(ValueError):
+        ChatPersistenceService._deserialize_history('[{"role": "assistant", "content": "Hello"}]')
@@ -0,0 +1,125 @@
+"""
+Unit tests for the Server-Sent Events framing of the streaming chat endpoint.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic_ai")
+pytest.importorskip("llama_index.core")
+
+from app.api.endpoints import chat_endpoints
+from app.api.endpoints.chat_endpoints import ChatRequest, process_chat_stream
+from app.core.llamaindex_orchestrator import Output, Usage
+from app.utils.chat_persistence import ChatPersistenceService
+
+
+def _output(answer: str) -> Output:
+    return Output(
+        answer=answer,
+        sources=[],
+        confidence=0.8,
+        retriever_type="brs",
+        usage=Usage(requests=1, request_tokens=10, response_tokens=5, total_tokens=15),
+        recommended_follow_up_questions=[],
+    )
+
+
+@pytest.fixture
+def saved_messages(monkeypatch):
+    """Replace chat persistence with in-memory fakes; returns the saved messages."""
+    saved = []
+
+    async def get_chat_by_session_id(db, session_id):
+        return object()
+
+    async def load_history(db, session_id):
+        return None
+
+    async def save_message(db, session_id, message_type, message_object, history=None):
+        saved.append((message_type, message_object))
+        return True
+
+    monkeypatch.setattr(ChatPersistenceService, "get_chat_by_session_id", staticmethod(get_chat_by_session_id))
+    monkeypatch.setattr(ChatPersistenceService, "load_history", staticmethod(load_history))
+    monkeypatch.setattr(ChatPersistenceService, "save_message", staticmethod(save_message))
+    return saved
+
+
+def _stream(monkeypatch, items, message="How do I register a business?"):
+    async def fake_agent_stream(**kwargs):
+        for item in items:
+            yield item
+
+    monkeypatch.setattr(chat_endpoints, "run_llamaindex_agent_stream", fake_agent_stream)
+
+    async def run():
+        response = await process_chat_stream(
+            ChatRequest(message=message, session_id="session-1"),
+            agency=None,
+            db=None,
+            api_key_info=None,
+        )
+        return response.media_type, [chunk async for chunk in response.body_iterator]
+
+    return asyncio.run(run())
+
+
+def _events(chunks):
+    events = []
+    for chunk in chunks:
+        assert chunk.startswith("data: ") and chunk.endswith("\n\n")
+        events.append(json.loads(chunk[len("data: "):]))
+    return events
+
+
+def test_deltas_are_framed_then_one_final_event(monkeypatch, saved_messages):
+    media_type, chunks = _stream(monkeypatch, ["Apply ", "online.", _output("Apply online.")])
+    events = _events(chunks)
+
+    assert media_type == "text/event-stream"
+    assert events[:2] == [
+        {"type": "delta", "content": "Apply "},
+        {"type": "delta", "content": "online."},
+    ]
+    final = events[-1]
+    assert len(events) == 3
+    assert final["type"] == "final"
+    assert final["session_id"] == "session-1"
+    assert final["answer"] == "Apply online."
+    assert final["usage"]["total_tokens"] == 15
+    assert [message_type for message_type, _ in saved_messages] == ["user", "assistant"]
+
+
+def test_stream_without_final_output_sends_fallback_final_event(monkeypatch, saved_messages):
+    _, chunks = _stream(monkeypatch, ["partial"])
+    events = _events(chunks)
+
+    assert events[-1]["type"] == "final"
+    assert events[-1]["answer"]
+    assert events[-1]["confidence"] == 0.0
+    assert [message_type for message_type, _ in saved_messages] == ["user", "assistant"]
+
+
+def test_agent_errors_are_sent_as_an_error_event(monkeypatch, saved_messages):
+    async def failing_agent_stream(**kwargs):
+        yield "partial"
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(chat_endpoints, "run_llamaindex_agent_stream", failing_agent_stream)
+
+    async def run():
+        response = await process_chat_stream(
+            ChatRequest(message="hello", session_id="session-1"), agency=None, db=None, api_key_info=None
+        )
+        return [chunk async for chunk in response.body_iterator]
+
+    events = _events(asyncio.run(run()))
+
+    assert events[0] == {"type": "delta", "content": "partial"}
+    assert events[-1]["type"] == "error"
+    assert "LLM unavailable" in events[-1]["detail"]
+    assert saved_messages == []
@@ -0,0 +1,137 @@
+"""
+Unit tests for buffered, idempotent node writes in app.core.rag.indexer.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+pytest.importorskip("llama_index.vector_stores.chroma")
+pytest.importorskip("sqlalchemy")
+
+from app.core.rag import indexer
+from app.core.rag.indexer import _NodeUpsertBuffer, _replace_document_nodes
+
+
+class _FakeChromaCollection:
+    """Stores node ids by source document, honouring document_id $in deletes."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def delete(self, where):
+        doomed = set(where["document_id"]["$in"])
+        self.rows = {node_id: doc_id for node_id, doc_id in self.rows.items() if doc_id not in doomed}
+
+
+class _FakeVectorStore:
+    def __init__(self, fail_add: bool = False):
+        self.client = _FakeChromaCollection()
+        self.fail_add = fail_add
+        self.add_calls = 0
+
+    def add(self, nodes):
+        self.add_calls += 1
+        if self.fail_add:
+            raise RuntimeError("chroma unavailable")
+        for node in nodes:
+            self.client.rows[node.node_id] = node.ref_doc_id
+
+
+def _nodes(doc_id: int, count: int = 2):
+    return [
+        SimpleNamespace(node_id=f"webpage-{doc_id}-chunk-{i}", ref_doc_id=f"webpage-{doc_id}")
+        for i in range(count)
+    ]
+
+
+class _FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+@pytest.fixture
+def marked(monkeypatch):
+    """Record the ids passed to mark_documents_as_indexed; set .fail to make it raise."""
+    state = SimpleNamespace(calls=[], fail=False)
+
+    async def mark_documents_as_indexed(db, document_ids):
+        if state.fail:
+            raise RuntimeError("database unavailable")
+        state.calls.append(list(document_ids))
+
+    monkeypatch.setattr(indexer, "async_session_maker", _FakeSession)
+    monkeypatch.setattr(indexer, "mark_documents_as_indexed", mark_documents_as_indexed)
+    return state
+
+
+def test_replace_document_nodes_is_idempotent():
+    store = _FakeVectorStore()
+    _replace_document_nodes(store, _nodes(1) + _nodes(2))
+    _replace_document_nodes(store, _nodes(1))
+
+    assert sorted(store.client.rows) == [
+        "webpage-1-chunk-0", "webpage-1-chunk-1", "webpage-2-chunk-0", "webpage-2-chunk-1",
+    ]
+
+
+def test_replace_document_nodes_drops_stale_chunks_of_the_same_document():
+    store = _FakeVectorStore()
+    _replace_document_nodes(store, _nodes(1, count=3))
+    _replace_document_nodes(store, _nodes(1, count=1))
+
+    assert list(store.client.rows) == ["webpage-1-chunk-0"]
+
+
+def test_buffer_flushes_when_full_and_on_demand(marked):
+    store = _FakeVectorStore()
+    buffer = _NodeUpsertBuffer(store, max_nodes=3)
+
+    async def run():
+        first = await buffer.add(_nodes(1), [1])
+        second = await buffer.add(_nodes(2), [2])
+        third = await buffer.add(_nodes(3), [3])
+        rest = await buffer.flush()
+        return first, second, third, rest
+
+    assert asyncio.run(run()) == (0, 2, 0, 1)
+    assert marked.calls == [[1, 2], [3]]
+    assert store.add_calls == 2
+
+
+def test_flush_error_propagates_and_leaves_documents_unmarked(marked):
+    store = _FakeVectorStore(fail_add=True)
+    buffer = _NodeUpsertBuffer(store, max_nodes=100)
+
+    async def run():
+        await buffer.add(_nodes(1), [1])
+        await buffer.flush()
+
+    with pytest.raises(RuntimeError, match="chroma unavailable"):
+        asyncio.run(run())
+    assert marked.calls == []
+
+
+def test_retry_after_failed_mark_replaces_vectors_instead_of_duplicating(marked):
+    store = _FakeVectorStore()
+
+    async def index_once():
+        buffer = _NodeUpsertBuffer(store, max_nodes=100)
+        await buffer.add(_nodes(1), [1])
+        return await buffer.flush()
+
+    marked.fail = True
+    with pytest.raises(RuntimeError, match="database unavailable"):
+        asyncio.run(index_once())
+    # The vectors were written but the row was not marked, so the next run retries it
+    assert len(store.client.rows) == 2
+
+    marked.fail = False
+    assert asyncio.run(index_once()) == 1
+    assert sorted(store.client.rows) == ["webpage-1-chunk-0", "webpage-1-chunk-1"]
+    assert marked.calls == [[1]]
@@ -0,0 +1,95 @@
+"""
+Unit tests for the query-embedding batcher in app.core.rag.embeddings.
+"""
+
+import asyncio
+
+from app.core.rag.embeddings import _QueryEmbeddingBatcher
+
+
+class _RecordingEmbedder:
+    """Fake batch embedder that records each call's inputs."""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    def __call__(self, queries):
+        self.calls.append(list(queries))
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return [[float(len(query))] for query in queries]
+
+
+def test_concurrent_queries_share_one_model_call():
+    embedder = _RecordingEmbedder()
+    batcher = _QueryEmbeddingBatcher(embedder, window=0.05, max_size=32)
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed(q) for q in ["a", "bb", "ccc"]))
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [3.0]]
+    assert embedder.calls == [["a", "bb", "ccc"]]
+
+
+def test_full_batch_is_flushed_without_waiting_for_the_window():
+    embedder = _RecordingEmbedder()
+    # A window this long would time the test out if size didn't trigger the flush
+    batcher = _QueryEmbeddingBatcher(embedder, window=60, max_size=2)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(batcher.embed("a"), batcher.embed("bb")), timeout=5
+        )
+
+    assert asyncio.run(run()) == [[1.0], [2.0]]
+    assert embedder.calls == [["a", "bb"]]
+
+
+def test_queries_in_separate_windows_are_separate_batches():
+    embedder = _RecordingEmbedder()
+    batcher = _QueryEmbeddingBatcher(embedder, window=0.01, max_size=32)
+
+    async def run():
+        first = await batcher.embed("a")
+        second = await batcher.embed("bb")
+        return first, second
+
+    assert asyncio.run(run()) == ([1.0], [2.0])
+    assert embedder.calls == [["a"], ["bb"]]
+
+
+def test_model_errors_reach_every_waiting_caller():
+    embedder = _RecordingEmbedder(fail=True)
+    batcher = _QueryEmbeddingBatcher(embedder, window=0.01, max_size=32)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.embed("a"), batcher.embed("bb"), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(embedder.calls) == 1
+
+
+def test_cancelled_caller_does_not_break_the_batch():
+    embedder = _RecordingEmbedder()
+    batcher = _QueryEmbeddingBatcher(embedder, window=0.05, max_size=32)
+
+    async def run():
+        cancelled = asyncio.ensure_future(batcher.embed("a"))
+        kept = asyncio.ensure_future(batcher.embed("bb"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    assert asyncio.run(run()) == [2.0]
+
+
+def test_batcher_can_be_reused_across_event_loops():
+    embedder = _RecordingEmbedder()
+    batcher = _QueryEmbeddingBatcher(embedder, window=0.01, max_size=32)
+
+    assert asyncio.run(batcher.embed("a")) == [1.0]
+    assert asyncio.run(batcher.embed("bb")) == [2.0]
@@ -0,0 +1,82 @@
+"""
+Unit tests for the embedding-similarity caches in app.core.semantic_cache.
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.core.semantic_cache import SemanticCache
+
+
+def test_lookup_misses_on_empty_namespace():
+    cache = SemanticCache(threshold=0.9)
+
+    assert cache.lookup("kfc", [1.0, 0.0]) is None
+
+
+def test_lookup_hits_for_near_duplicate_embedding():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("kfc", [1.0, 0.0], "answer")
+
+    # Scaled and slightly rotated: cosine similarity ~0.995
+    assert cache.lookup("kfc", [2.0, 0.2]) == "answer"
+
+
+def test_lookup_misses_below_threshold():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("kfc", [1.0, 0.0], "answer")
+
+    # cosine similarity ~0.707
+    assert cache.lookup("kfc", [1.0, 1.0]) is None
+
+
+def test_lookup_returns_most_similar_entry():
+    cache = SemanticCache(threshold=0.5)
+    cache.store("kfc", [1.0, 0.0], "first")
+    cache.store("kfc", [0.0, 1.0], "second")
+
+    assert cache.lookup("kfc", [0.2, 1.0]) == "second"
+
+
+def test_namespaces_are_isolated():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("kfc", [1.0, 0.0], "answer")
+
+    assert cache.lookup("brs", [1.0, 0.0]) is None
+
+
+def test_oldest_entries_are_evicted():
+    cache = SemanticCache(threshold=0.99, max_entries=2)
+    cache.store("kfc", [1.0, 0.0, 0.0], "first")
+    cache.store("kfc", [0.0, 1.0, 0.0], "second")
+    cache.store("kfc", [0.0, 0.0, 1.0], "third")
+
+    assert cache.lookup("kfc", [1.0, 0.0, 0.0]) is None
+    assert cache.lookup("kfc", [0.0, 1.0, 0.0]) == "second"
+    assert cache.lookup("kfc", [0.0, 0.0, 1.0]) == "third"
+
+
+def test_least_recently_used_namespace_is_evicted():
+    cache = SemanticCache(threshold=0.9, max_namespaces=2)
+    cache.store("kfc", [1.0, 0.0], "kfc answer")
+    cache.store("brs", [1.0, 0.0], "brs answer")
+    # A hit marks kfc as recently used, so adding odpc evicts brs
+    assert cache.lookup("kfc", [1.0, 0.0]) == "kfc answer"
+    cache.store("odpc", [1.0, 0.0], "odpc answer")
+
+    assert cache.lookup("brs", [1.0, 0.0]) is None
+    assert cache.lookup("kfc", [1.0, 0.0]) == "kfc answer"
+
+
+def test_invalidate_and_clear():
+    cache = SemanticCache(threshold=0.9)
+    cache.store("kfc", [1.0, 0.0], "kfc answer")
+    cache.store("brs", [1.0, 0.0], "brs answer")
+
+    cache.invalidate("kfc")
+    assert cache.lookup("kfc", [1.0, 0.0]) is None
+    assert cache.lookup("brs", [1.0, 0.0]) == "brs answer"
+
+    cache.clear()
+    assert cache.lookup("brs", [1.0, 0.0]) is None
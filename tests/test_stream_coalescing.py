@@ -0,0 +1,71 @@
+"""
+Unit tests for answer-delta coalescing in the streaming LlamaIndex agent.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from llama_index.core.agent.workflow import AgentStream
+
+from app.core.llamaindex_orchestrator import _coalesce_deltas
+
+
+def _delta(text: str) -> AgentStream:
+    return AgentStream(delta=text, response=text, current_agent_name="agent")
+
+
+async def _events(spec):
+    """Yield a delta event for each (text, delay_before) pair."""
+    for text, delay in spec:
+        await asyncio.sleep(delay)
+        yield _delta(text)
+
+
+async def _collect(events, interval):
+    start = time.monotonic()
+    return [(chunk, time.monotonic() - start) async for chunk in _coalesce_deltas(events, interval)]
+
+
+def test_first_delta_is_sent_immediately_and_later_ones_coalesced():
+    chunks = asyncio.run(_collect(_events([("a", 0), ("b", 0.01), ("c", 0.01)]), 0.2))
+
+    assert [chunk for chunk, _ in chunks] == ["a", "bc"]
+
+
+def test_pending_text_is_flushed_on_the_deadline_during_a_stall():
+    chunks = asyncio.run(_collect(_events([("a", 0), ("b", 0.01), ("c", 1.0)]), 0.1))
+
+    assert [chunk for chunk, _ in chunks] == ["a", "b", "c"]
+    # "b" went out at the 0.1 s deadline, not when "c" ended the 1 s stall
+    assert chunks[1][1] < 0.5
+
+
+def test_non_delta_events_are_ignored():
+    async def events():
+        yield _delta("a")
+        yield object()
+        yield _delta("")
+
+    chunks = asyncio.run(_collect(events(), 0.1))
+
+    assert [chunk for chunk, _ in chunks] == ["a"]
+
+
+def test_zero_interval_sends_every_delta():
+    chunks = asyncio.run(_collect(_events([("a", 0), ("b", 0), ("c", 0)]), 0))
+
+    assert [chunk for chunk, _ in chunks] == ["a", "b", "c"]
+
+
+def test_closing_early_stops_reading_events():
+    async def run():
+        stream = _coalesce_deltas(_events([("a", 0), ("b", 5)]), 0.1)
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(run()) == "a"